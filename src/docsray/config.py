@@ -60,6 +60,7 @@ class LlamaParseConfig(BaseModel):
     enabled: bool = Field(default=False)
     api_key: Optional[str] = Field(default=None)
     mode: str = Field(default="balanced")
+    max_concurrency: int = Field(default=4, ge=1, description="Maximum concurrent LlamaParse API calls")
 
     @field_validator("mode")
     @classmethod
@@ -85,7 +86,17 @@ class MimicDocsrayConfig(BaseModel):
     coarse_to_fine: bool = Field(default=True)
     rag_enabled: bool = Field(default=True)
     vector_store_type: str = Field(default="faiss")
+    vector_index_type: str = Field(
+        default="flat",
+        description="FAISS index: flat, sq8 for 8-bit quantized vectors, or ivfpq to compress large corpora",
+    )
+    use_gpu: bool = Field(default=False, description="Place the FAISS index on a GPU when one is available")
     embedding_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
+    embedding_batch_size: int = Field(default=32, ge=1, description="Chunks encoded per embedding model batch")
+    embedding_cache_dir: Optional[str] = Field(
+        default=None,
+        description="Directory where chunk embeddings are persisted across restarts; disabled when unset",
+    )
 
     @field_validator("search_depth")
     @classmethod
@@ -101,6 +112,13 @@ class MimicDocsrayConfig(BaseModel):
             raise ValueError("vector_store_type must be 'faiss', 'chroma', 'pinecone', or 'memory'")
         return v
 
+    @field_validator("vector_index_type")
+    @classmethod
+    def validate_vector_index_type(cls, v: str) -> str:
+        if v not in ["flat", "sq8", "ivfpq"]:
+            raise ValueError("vector_index_type must be 'flat', 'sq8', or 'ivfpq'")
+        return v
+
 
 class IBMDoclingConfig(BaseModel):
     """IBM.Docling provider configuration."""
@@ -191,6 +209,7 @@ class DocsrayConfig(BaseModel):
                     # This allows compatibility with both Docsray-specific config and standard LlamaParse env var
                     "api_key": os.getenv("DOCSRAY_LLAMAPARSE_API_KEY") or os.getenv("LLAMAPARSE_API_KEY"),
                     "mode": os.getenv("DOCSRAY_LLAMAPARSE_MODE", "balanced"),
+                    "max_concurrency": int(os.getenv("DOCSRAY_LLAMAPARSE_MAX_CONCURRENCY", "4")),
                 },
                 "mimic_docsray": {
                     "enabled": os.getenv("DOCSRAY_MIMIC_ENABLED", "false").lower() == "true",
@@ -208,7 +227,11 @@ class DocsrayConfig(BaseModel):
                     "coarse_to_fine": os.getenv("DOCSRAY_MIMIC_COARSE_TO_FINE", "true").lower() == "true",
                     "rag_enabled": os.getenv("DOCSRAY_MIMIC_RAG_ENABLED", "true").lower() == "true",
                     "vector_store_type": os.getenv("DOCSRAY_MIMIC_VECTOR_STORE", "faiss"),
+                    "vector_index_type": os.getenv("DOCSRAY_MIMIC_VECTOR_INDEX", "flat"),
+                    "use_gpu": os.getenv("DOCSRAY_MIMIC_USE_GPU", "false").lower() == "true",
                     "embedding_model": os.getenv("DOCSRAY_MIMIC_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+                    "embedding_batch_size": int(os.getenv("DOCSRAY_MIMIC_EMBEDDING_BATCH_SIZE", "32")),
+                    "embedding_cache_dir": os.getenv("DOCSRAY_MIMIC_EMBEDDING_CACHE_DIR"),
                 },
                 "ibm_docling": {
                     "enabled": os.getenv("DOCSRAY_IBM_DOCLING_ENABLED", "false").lower() == "true",
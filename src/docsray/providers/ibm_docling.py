@@ -4,14 +4,20 @@ This provider lazily imports heavy dependencies so it can be registered even whe
 optional packages aren't installed. Actual initialization happens on first use.
 """
 
-import hashlib
+import asyncio
 import logging
 import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from ..config import IBMDoclingConfig
-from ..utils.documents import download_document, get_document_format, get_local_document, is_url
+from ..utils.documents import (
+    calculate_file_hash,
+    download_document,
+    get_document_format,
+    get_local_document,
+    is_url,
+)
 from .base import (
     Document,
     DocumentProvider,
@@ -614,8 +620,7 @@ class IBMDoclingProvider(DocumentProvider):
         if local_path:
             document.path = local_path
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = await asyncio.to_thread(calculate_file_hash, local_path)
             return local_path
 
         # It's a URL, download it
@@ -623,8 +628,7 @@ class IBMDoclingProvider(DocumentProvider):
             local_path = await download_document(document.url)
             document.path = local_path
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = await asyncio.to_thread(calculate_file_hash, local_path)
             return local_path
 
         raise ValueError(f"Unable to process document: {document.url}")
@@ -3,14 +3,29 @@
 import asyncio
 import hashlib
 import logging
+import re
 import tempfile
+from collections import OrderedDict, defaultdict
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
-from llama_parse import LlamaParse
+import httpx
+
+try:
+    import re2
+except ImportError:  # Optional speedup; the stdlib re module is used otherwise
+    re2 = None
 
 from ..config import LlamaParseConfig
-from ..utils.documents import download_document, get_document_format, get_local_document, is_url
+from ..utils.documents import (
+    calculate_file_hash,
+    download_document,
+    get_document_format,
+    get_local_document,
+    is_download_current,
+    is_url,
+)
 from ..utils.llamaparse_cache import LlamaParseCache
 from .base import (
     Document,
@@ -23,71 +38,260 @@ from .base import (
     XrayResult,
 )
 
+if TYPE_CHECKING:
+    from llama_parse import LlamaParse
+
 logger = logging.getLogger(__name__)
 
+# Markdown ATX heading: captures the run of '#' (level) and the title text,
+# which must be separated by whitespace so "#hashtag" lines are not headings.
+# Multiline so a whole page can be scanned with finditer instead of per line.
+_HEADING_RE = re.compile(r'^(#{1,6})[^\S\n]+(.+?)[^\S\n]*$', re.MULTILINE)
+
+# Acronyms like IRS, SSA, or capitalized proper names. Two-letter acronyms
+# are too short to report, so they are rejected by the pattern itself rather
+# than matched and filtered. This sweep runs over the whole document text, so
+# google-re2's linear-time engine is used for it when installed (the pattern
+# has no backreferences or lookarounds). re2's \b and \s only know ASCII, so it
+# only gets ASCII text, with \s spelled out as the ASCII characters Python's
+# \s matches; the results are then the same with or without re2
+_ENTITY_RE = re.compile(r'\b[A-Z]{3,}\b|\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_ENTITY_ASCII_PATTERN = r'\b[A-Z]{3,}\b|\b[A-Z][a-z]+(?:[\t\n\v\f\r \x1c-\x1f]+[A-Z][a-z]+)*\b'
+_ENTITY_ASCII_RE = re2.compile(_ENTITY_ASCII_PATTERN) if re2 else _ENTITY_RE
+_ENTITY_STOPWORDS = frozenset({"The", "This", "That"})
+
+# "- Entity name" listing lines returned for entity extraction instructions;
+# captures the text after the leading dashes, trimmed
+_ENTITY_LISTING_RE = re.compile(r'^[^\S\n]*-+[^\S\n]*(.*?)[^\S\n]*$', re.MULTILINE)
+
+# List markers that flag a line as a key point, and the prefix to strip from it
+_BULLET_PREFIXES = ('•', '-', '*', '1.', '2.', '3.')
+_BULLET_PREFIX_RE = re.compile(r'^[•\-*\d.\s]+')
+
+# Runs of text between periods, scanned lazily for fallback key points
+_SENTENCE_RE = re.compile(r'[^.]+')
+
+# Attributes read from LlamaParse page/image/table objects that are not dicts
+_PAGE_FIELDS = ("page_num", "text", "markdown", "images", "tables", "layout")
+_IMAGE_FIELDS = ("data", "type", "metadata")
+_TABLE_FIELDS = ("html", "data", "metadata")
+
+_MISSING = object()
+
+# Number of document digests remembered by _hash_file
+_HASH_CACHE_SIZE = 256
+
+# Prefix for derived scan results memoized on a parsed result dict; these
+# keys are never part of provider output
+_CACHE_PREFIX = "_cache_"
+
+# Page count from which regex scans of a parsed result (sections, entities,
+# hierarchy) are moved off the event loop into a worker thread
+_OFFLOAD_MIN_PAGES = 32
+
+# LlamaParse API call timeout: at least _API_TIMEOUT_MIN seconds, scaled up by
+# _API_TIMEOUT_PER_MB for large files, with transient failures retried after
+# exponential backoff (1s, 2s, ...)
+_API_TIMEOUT_MIN = 60.0
+_API_TIMEOUT_PER_MB = 5.0
+_API_MAX_ATTEMPTS = 3
+_API_RETRYABLE_ERRORS = (asyncio.TimeoutError, httpx.TransportError)
+
+
+def _as_dict(obj: Any, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Normalize a LlamaParse response item to a dict.
+    
+    Dicts are returned as-is; other objects have the named attributes that
+    they define copied into a new dict, so callers can use ``.get`` defaults.
+    """
+    if isinstance(obj, dict):
+        return obj
+    
+    values = {}
+    for name in fields:
+        value = getattr(obj, name, _MISSING)
+        if value is not _MISSING:
+            values[name] = value
+    return values
+
+
+def _as_page_number(value: Any, default: int) -> int:
+    """Coerce a page number from the API to int so page lookups share one key type."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _page_content(page: Dict[str, Any]) -> str:
+    """Return a page's markdown, falling back to its plain text.
+    
+    Uses the ``content`` field normalized by ``_normalize_pages`` when present.
+    """
+    content = page.get("content")
+    if content is None:
+        content = page.get("markdown") or page.get("text") or ""
+    return content
+
+
+def _normalize_pages(result: Any) -> Any:
+    """Store each page's preferred content under ``content`` once per result.
+    
+    The same pass totals the pages' plain-text length for extract statistics.
+    """
+    if isinstance(result, dict):
+        total_chars = 0
+        for page in result.get("pages") or []:
+            text = page.get("text") or ""
+            total_chars += len(text)
+            page["content"] = page.get("markdown") or text
+        result[_CACHE_PREFIX + "total_chars"] = total_chars
+    return result
+
+
+def _total_text_chars(result: Dict[str, Any]) -> int:
+    """Total plain-text length of a result's pages, as counted by ``_normalize_pages``."""
+    total = result.get(_CACHE_PREFIX + "total_chars")
+    if total is None:
+        total = sum(map(len, (page.get("text") or "" for page in result.get("pages") or [])))
+    return total
+
+
+def _without_cache(result: Any) -> Any:
+    """Return a shallow copy of a parsed result without provider-internal keys.
+    
+    Drops memoized scan results and the normalized per-page ``content`` field,
+    which only duplicates the page markdown/text.
+    """
+    if not isinstance(result, dict):
+        return result
+    
+    public = {key: value for key, value in result.items() if not key.startswith(_CACHE_PREFIX)}
+    pages = public.get("pages")
+    if pages and any(_is_internal_key(key) for page in pages for key in page):
+        public["pages"] = [
+            {key: value for key, value in page.items() if not _is_internal_key(key)} for page in pages
+        ]
+    return public
+
+
+def _is_internal_key(key: str) -> bool:
+    """Whether a page key was added by the provider rather than the API."""
+    return key == "content" or key.startswith(_CACHE_PREFIX)
+
+
+def _resource_flags(result: Any) -> Dict[str, bool]:
+    """Return which kinds of content a parsed result contains.
+    
+    Computed once per result and memoized on it, so peek/xray checks after
+    the first are dict lookups instead of page scans.
+    """
+    if not isinstance(result, dict):
+        return {"hasText": False, "hasImages": False, "hasTables": False, "hasLayout": False}
+    
+    flags = result.get(_CACHE_PREFIX + "flags")
+    if flags is None:
+        pages = result.get("pages") or []
+        flags = {
+            "hasText": bool(result.get("documents") or pages),
+            "hasImages": bool(result.get("images")),
+            "hasTables": bool(result.get("tables")),
+            "hasLayout": any(page.get("layout") for page in pages),
+        }
+        result[_CACHE_PREFIX + "flags"] = flags
+    return flags
+
+
+def _group_by_page(items: Iterable[Dict[str, Any]]) -> Dict[Any, List[Dict[str, Any]]]:
+    """Bucket tables or images by their ``page`` field in a single pass."""
+    by_page = defaultdict(list)
+    for item in items:
+        by_page[item.get("page")].append(item)
+    return dict(by_page)
+
+
+def _resources_by_page(result: Dict[str, Any], kind: str) -> Dict[Any, List[Dict[str, Any]]]:
+    """Return a result's ``tables`` or ``images`` bucketed by page number.
+    
+    Memoized on the result so map and the markdown formatter share one
+    grouping pass over the resource list.
+    """
+    key = _CACHE_PREFIX + kind + "_by_page"
+    by_page = result.get(key)
+    if by_page is None:
+        by_page = _group_by_page(result.get(kind) or ())
+        result[key] = by_page
+    return by_page
+
 
 class LlamaParseProvider(DocumentProvider):
     """Document provider using LlamaParse for advanced AI-powered parsing."""
 
+    # Static provider description, built once at class creation rather than
+    # on every get_supported_formats()/get_capabilities()/can_process() call
+    _SUPPORTED_FORMATS: Tuple[str, ...] = (
+        "pdf", "docx", "pptx", "xlsx", "html", "xml", "json", "csv", "tsv",
+        "md", "rst", "rtf", "txt", "epub", "eml", "msg", "org", "odt", "ods", "odp"
+    )
+    _SUPPORTED_SET = frozenset(_SUPPORTED_FORMATS)
+    _MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+    _CAPABILITIES = ProviderCapabilities(
+        formats=list(_SUPPORTED_FORMATS),
+        features={
+            "ocr": True,
+            "tables": True,
+            "images": True,
+            "forms": True,
+            "multiLanguage": True,
+            "streaming": False,
+            "customInstructions": True,
+            "imageExtraction": True,  # Can extract images
+            "layoutPreservation": True,  # Preserves document layout
+            "structuredData": True,  # Returns structured JSON
+            "htmlTables": True,  # Can output tables as HTML
+            "pageScreenshots": True,  # Can capture page screenshots
+        },
+        performance={
+            "maxFileSize": _MAX_FILE_SIZE,
+            "averageSpeed": 5,  # pages per second (slower due to AI processing)
+        }
+    )
+
     def __init__(self):
         self.config: Optional[LlamaParseConfig] = None
         self._initialized = False
-        self.parser: Optional[LlamaParse] = None
+        self.parser: Optional["LlamaParse"] = None
         self.cache = LlamaParseCache()  # Initialize cache manager
+        self._hash_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._api_semaphore: Optional[asyncio.Semaphore] = None
+        # url -> (local path, ETag/Last-Modified validators, sha256) of earlier downloads
+        self._url_cache: Dict[str, Tuple[Path, Dict[str, str], str]] = {}
 
     def get_name(self) -> str:
         return "llama-parse"
 
     def get_supported_formats(self) -> List[str]:
-        return [
-            "pdf", "docx", "pptx", "xlsx", "html", "xml", "json", "csv", "tsv",
-            "md", "rst", "rtf", "txt", "epub", "eml", "msg", "org", "odt", "ods", "odp"
-        ]
+        return list(self._SUPPORTED_FORMATS)
 
     def get_capabilities(self) -> ProviderCapabilities:
-        return ProviderCapabilities(
-            formats=self.get_supported_formats(),
-            features={
-                "ocr": True,
-                "tables": True,
-                "images": True,
-                "forms": True,
-                "multiLanguage": True,
-                "streaming": False,
-                "customInstructions": True,
-                "imageExtraction": True,  # Can extract images
-                "layoutPreservation": True,  # Preserves document layout
-                "structuredData": True,  # Returns structured JSON
-                "htmlTables": True,  # Can output tables as HTML
-                "pageScreenshots": True,  # Can capture page screenshots
-            },
-            performance={
-                "maxFileSize": 100 * 1024 * 1024,  # 100MB
-                "averageSpeed": 5,  # pages per second (slower due to AI processing)
-            }
-        )
+        return self._CAPABILITIES
 
     async def can_process(self, document: Document) -> bool:
         """Check if provider can process the document."""
-        # Initialize if needed
-        if not self._initialized and self.config:
-            await self.initialize(self.config)
-        
-        if not self._initialized:
+        # Cheapest rejections first: size, then format (only parsing the URL
+        # when the document has no format yet), before touching the client
+        if document.size and document.size > self._MAX_FILE_SIZE:
             return False
 
-        # Check format
         doc_format = document.format or get_document_format(document.url)
-        if doc_format and doc_format.lower() not in self.get_supported_formats():
+        if doc_format and doc_format.lower() not in self._SUPPORTED_SET:
             return False
 
-        # Check size limit
-        if document.size:
-            max_size = self.get_capabilities().performance["maxFileSize"]
-            if document.size > max_size:
-                return False
-
-        return True
+        # Initialize if needed
+        if not self._initialized and self.config:
+            await self.initialize(self.config)
+        
+        return self._initialized
 
     async def peek(self, document: Document, options: Dict[str, Any]) -> PeekResult:
         """Get document overview showing LlamaParse capabilities and available formats."""
@@ -108,39 +312,40 @@ class LlamaParseProvider(DocumentProvider):
                     
                     # Check if we have cached data first
                     if self.cache:
-                        cached_data = await self.cache.get_cached_extraction(doc_path)
+                        cached_data = await self.cache.get_cached_extraction(doc_path, document_hash=document.hash)
                         if cached_data:
                             result = cached_data
                             logger.info(f"Using cached LlamaParse data for peek")
                         else:
                             # Parse document with minimal extraction for peek
-                            result = await self._parse_document(doc_path, parsing_instruction="Extract document metadata and structure only")
+                            result = await self._parse_document(doc_path, parsing_instruction="Extract document metadata and structure only",
+                                                                doc_hash=document.hash)
                     else:
-                        result = await self._parse_document(doc_path, parsing_instruction="Extract document metadata and structure only")
+                        result = await self._parse_document(doc_path, parsing_instruction="Extract document metadata and structure only",
+                                                            doc_hash=document.hash)
                     
                     # Dynamically determine available formats based on actual result
                     if isinstance(result, dict):
                         # Check what's actually in the result
-                        if result.get("documents") or result.get("pages"):
+                        flags = _resource_flags(result)
+                        if flags["hasText"]:
                             available_formats["text"] = True
                             available_formats["markdown"] = True
                             available_features.append("text_extraction")
                             available_features.append("markdown_extraction")
-                        
-                        if result.get("documents") or result.get("pages"):
                             available_formats["json"] = True
                             available_features.append("structured_output")
                         
-                        if result.get("images"):
+                        if flags["hasImages"]:
                             available_formats["images"] = True
                             available_features.append("image_extraction")
                         
-                        if result.get("tables"):
+                        if flags["hasTables"]:
                             available_formats["tables"] = True
                             available_features.append("table_extraction")
                         
                         # Check for layout information
-                        if any(p.get("layout") for p in result.get("pages", [])):
+                        if flags["hasLayout"]:
                             available_formats["layout"] = True
                             available_features.append("layout_preservation")
                     
@@ -178,21 +383,25 @@ class LlamaParseProvider(DocumentProvider):
             preview = {}
 
             if depth in ["structure", "preview"]:
+                sections = await self._offload_scan(result, self._extract_sections, result)
                 structure = {
-                    "hasImages": len(result.get("images", [])) > 0 if isinstance(result, dict) else False,
-                    "hasTables": len(result.get("tables", [])) > 0 if isinstance(result, dict) else False,
-                    "sections": self._extract_sections(result),
+                    "hasImages": _resource_flags(result)["hasImages"],
+                    "hasTables": _resource_flags(result)["hasTables"],
+                    "sections": sections,
                     "totalDocuments": len(result.get("documents", [])) if isinstance(result, dict) else 0,
-                    "extractionTypes": list(result.keys()) if isinstance(result, dict) else []
+                    "extractionTypes": list(_without_cache(result).keys()) if isinstance(result, dict) else []
                 }
 
             if depth == "preview":
-                # Show a preview of different available formats
+                # Show a preview of different available formats, reading only
+                # the first page (which may be missing for empty documents)
+                first_page = (result.get("pages") or [{}])[0] if isinstance(result, dict) else {}
+                entities = await self._offload_scan(result, self._extract_entities, result) if isinstance(result, dict) else []
                 preview = {
-                    "firstPageText": result.get("pages", [{}])[0].get("text", "")[:500] if isinstance(result, dict) else "",
-                    "firstPageMarkdown": result.get("pages", [{}])[0].get("markdown", "")[:500] if isinstance(result, dict) else "",
+                    "firstPageText": (first_page.get("text") or "")[:500],
+                    "firstPageMarkdown": (first_page.get("markdown") or "")[:500],
                     "tableOfContents": self._extract_toc(result),
-                    "sampleEntities": self._extract_entities(result)[:5] if isinstance(result, dict) else [],
+                    "sampleEntities": entities[:5],
                     "availableData": {
                         "documents": len(result.get("documents", [])) if isinstance(result, dict) else 0,
                         "pages": len(result.get("pages", [])) if isinstance(result, dict) else 0,
@@ -229,38 +438,36 @@ class LlamaParseProvider(DocumentProvider):
             result = await self._parse_document(
                 doc_path, 
                 parsing_instruction=instruction,
-                extract_images=extract_images
+                extract_images=extract_images,
+                doc_hash=document.hash
             )
 
+            # Build the hierarchy, page structure and section count in one
+            # pass over the pages
+            hierarchy, page_structure, section_count = await self._offload_scan(
+                result, self._traverse_pages, result, include_content
+            )
+            if not result.get("pages"):
+                # Without pages, sections come from the document-level text
+                section_count = len(self._extract_sections(result))
+            
             # Build enhanced document map
             document_map = {
-                "hierarchy": self._build_hierarchy_enhanced(result, include_content),
+                "hierarchy": hierarchy,
                 "resources": {
                     "images": result.get("images", []),
                     "tables": result.get("tables", []),
                     "equations": [],  # Could be extracted from content
                 },
                 "crossReferences": self._extract_references(result),
-                "pageStructure": []
+                "pageStructure": page_structure
             }
-            
-            # Add page structure information
-            for page in result.get("pages", []):
-                page_info = {
-                    "pageNumber": page.get("page_num", 1),
-                    "hasText": bool(page.get("text")),
-                    "hasImages": any(img.get("page") == page.get("page_num") for img in result.get("images", [])),
-                    "hasTables": any(tbl.get("page") == page.get("page_num") for tbl in result.get("tables", [])),
-                }
-                if page.get("layout"):
-                    page_info["layout"] = page["layout"]
-                document_map["pageStructure"].append(page_info)
 
             statistics = {
                 "totalPages": len(result.get("pages", [])),
                 "totalImages": len(result.get("images", [])),
                 "totalTables": len(result.get("tables", [])),
-                "totalSections": len(self._extract_sections(result)),
+                "totalSections": section_count,
                 "analysisDepth": analysis_depth,
             }
 
@@ -279,7 +486,7 @@ class LlamaParseProvider(DocumentProvider):
 
         try:
             # Parse document
-            result = await self._parse_document(doc_path)
+            result = await self._parse_document(doc_path, doc_hash=document.hash)
 
             # Find target location
             location = {}
@@ -332,16 +539,17 @@ class LlamaParseProvider(DocumentProvider):
             parsing_instruction = custom_instructions or "Extract all possible information from this document"
             
             # Parse document - this will either use cache or fetch new data
-            result = await self._parse_document(doc_path, parsing_instruction=parsing_instruction)
+            result = await self._parse_document(doc_path, parsing_instruction=parsing_instruction,
+                                                doc_hash=document.hash)
 
             # Return EVERYTHING from the extraction
             analysis = {
-                "full_extraction": result,  # All the raw extraction data
+                "full_extraction": _without_cache(result),  # All the raw extraction data
                 "summary": {
                     "total_documents": len(result.get("documents", [])) if isinstance(result, dict) else 0,
                     "total_pages": len(result.get("pages", [])) if isinstance(result, dict) else 0,
-                    "has_images": len(result.get("images", [])) > 0 if isinstance(result, dict) else False,
-                    "has_tables": len(result.get("tables", [])) > 0 if isinstance(result, dict) else False,
+                    "has_images": _resource_flags(result)["hasImages"],
+                    "has_tables": _resource_flags(result)["hasTables"],
                     "metadata": result.get("metadata", {}) if isinstance(result, dict) else {}
                 }
             }
@@ -414,7 +622,8 @@ class LlamaParseProvider(DocumentProvider):
                 doc_path, 
                 parsing_instruction=parsing_instruction,
                 result_type=result_type,
-                extract_images=extract_images
+                extract_images=extract_images,
+                doc_hash=document.hash
             )
 
             # Format output based on requested format
@@ -424,7 +633,7 @@ class LlamaParseProvider(DocumentProvider):
                 content = self._format_as_json_enhanced(result, extraction_targets)
             else:  # structured - return full rich data
                 content = {
-                    "pages": result.get("pages", []),
+                    "pages": _without_cache(result).get("pages", []),
                     "images": result.get("images", []) if "images" in extraction_targets else [],
                     "tables": result.get("tables", []) if "tables" in extraction_targets else [],
                     "metadata": result.get("metadata", {}),
@@ -432,9 +641,10 @@ class LlamaParseProvider(DocumentProvider):
                 }
 
             # Calculate enhanced statistics
+            result_pages = result.get("pages") or []
             statistics = {
-                "pagesExtracted": len(result.get("pages", [])),
-                "charactersExtracted": sum(len(p.get("text", "")) for p in result.get("pages", [])),
+                "pagesExtracted": len(result_pages),
+                "charactersExtracted": _total_text_chars(result),
                 "imagesFound": len(result.get("images", [])),
                 "tablesFound": len(result.get("tables", [])),
             }
@@ -443,7 +653,7 @@ class LlamaParseProvider(DocumentProvider):
             if pages:
                 pages_processed = pages
             else:
-                pages_processed = [p.get("page_num", i+1) for i, p in enumerate(result.get("pages", []))]
+                pages_processed = [p.get("page_num", i+1) for i, p in enumerate(result_pages)]
 
         except Exception as e:
             logger.error(f"Error extracting from document with LlamaParse: {e}")
@@ -467,20 +677,17 @@ class LlamaParseProvider(DocumentProvider):
             
             logger.info(f"Initializing LlamaParse with mode: {config.mode}, API key: {'****' + config.api_key[-4:] if config.api_key else 'None'}")
             
-            self.parser = LlamaParse(
-                api_key=config.api_key,
-                result_type="markdown",  # Default to markdown for rich content
-                parsing_instruction=None,  # Will be set per request
-                skip_diagonal_text=True,
-                invalidate_cache=False,
-                do_not_cache=False,
-                fast_mode=config.mode == "fast",
-                premium_mode=config.mode == "premium",
-                # Note: Additional options removed as they may not be valid for constructor
-                # and could cause hanging issues
-            )
+            self.parser = self._build_parser(config)
+            self._api_semaphore = None  # Recreated lazily with the configured limit
             self._initialized = True
             logger.info(f"LlamaParse provider initialized successfully in {config.mode} mode")
+        except ModuleNotFoundError as e:
+            logger.error(
+                "Failed to initialize LlamaParse provider: %s. Install optional deps with 'pip install \"docsray-mcp[ai]\"' or 'pip install llama-parse'.",
+                e
+            )
+            self._initialized = False
+            raise
         except Exception as e:
             logger.error(f"Failed to initialize LlamaParse provider: {e}")
             self._initialized = False
@@ -502,23 +709,178 @@ class LlamaParseProvider(DocumentProvider):
         if local_path:
             document.path = local_path
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = await self._hash_file(local_path)
             return local_path
 
         # It's a URL, download it
         if is_url(document.url):
-            local_path = await download_document(document.url)
+            # Reuse an earlier download if the server reports it unchanged
+            cached = self._url_cache.get(document.url)
+            if cached:
+                local_path, validators, digest = cached
+                if local_path.exists() and await is_download_current(document.url, validators):
+                    logger.info(f"Reusing unchanged download of {document.url}")
+                    document.path = local_path
+                    if not document.hash:
+                        document.hash = digest
+                    return local_path
+            
+            # Hash while streaming so the download is not read back to digest it
+            hasher = hashlib.sha256()
+            validators: Dict[str, str] = {}
+            local_path = await download_document(document.url, hasher=hasher, validators=validators)
             document.path = local_path
+            digest = hasher.hexdigest()
+            self._remember_hash(local_path, digest)
+            if validators:
+                self._url_cache[document.url] = (local_path, validators, digest)
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = digest
             return local_path
         
         raise ValueError(f"Unable to process document: {document.url}")
 
+    async def _hash_file(self, path: Path) -> str:
+        """Stream-hash a document off the event loop.
+        
+        Digests are memoized per (path, mtime, size), so repeated calls on an
+        unchanged file skip the hash pass.
+        """
+        key = self._hash_key(path)
+        digest = self._hash_cache.get(key)
+        if digest is not None:
+            self._hash_cache.move_to_end(key)
+            return digest
+        
+        digest = await asyncio.to_thread(calculate_file_hash, path)
+        self._store_hash(key, digest)
+        return digest
+
+    def _remember_hash(self, path: Path, digest: str) -> None:
+        """Seed the digest memo for a file whose hash is already known."""
+        self._store_hash(self._hash_key(path), digest)
+
+    @staticmethod
+    def _hash_key(path: Path) -> Tuple[str, int, int]:
+        stat = path.stat()
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def _store_hash(self, key: Tuple[str, int, int], digest: str) -> None:
+        self._hash_cache[key] = digest
+        self._hash_cache.move_to_end(key)
+        if len(self._hash_cache) > _HASH_CACHE_SIZE:
+            self._hash_cache.popitem(last=False)
+
+    @staticmethod
+    def _build_parser(config: LlamaParseConfig, parsing_instruction: Optional[str] = None,
+                      result_type: Optional[str] = None) -> "LlamaParse":
+        """Construct a LlamaParse client for the given per-request options.
+        
+        ``llama_parse`` is imported here rather than at module level, so loading
+        this provider does not pull in the SDK's dependency tree until it is used.
+        """
+        from llama_parse import LlamaParse
+        
+        return LlamaParse(
+            api_key=config.api_key,
+            result_type=result_type or "markdown",  # Default to markdown for rich content
+            parsing_instruction=parsing_instruction,
+            skip_diagonal_text=True,
+            invalidate_cache=False,
+            do_not_cache=False,
+            fast_mode=config.mode == "fast",
+            premium_mode=config.mode == "premium",
+            # Note: Additional options removed as they may not be valid for constructor
+            # and could cause hanging issues
+        )
+
+    def _parser_for(self, parsing_instruction: Optional[str] = None,
+                    result_type: Optional[str] = None) -> "LlamaParse":
+        """Return a parser for one request without mutating the shared client.
+        
+        Requests using the defaults share ``self.parser``; requests with a custom
+        instruction or result type get their own short-lived client so concurrent
+        calls cannot clobber each other's settings.
+        """
+        if not parsing_instruction and not result_type:
+            return self.parser
+        return self._build_parser(self.config, parsing_instruction, result_type)
+
+    async def _load_with_retry(self, parser: "LlamaParse", file_path_str: str, doc_path: Path) -> Any:
+        """Run the LlamaParse API call with a size-scaled timeout and backoff retries.
+        
+        Timeouts and transport errors are retried up to ``_API_MAX_ATTEMPTS``
+        times; any other error is raised immediately. The concurrency slot is
+        released while waiting to retry.
+        """
+        size_mb = doc_path.stat().st_size / (1024 * 1024)
+        timeout = max(_API_TIMEOUT_MIN, size_mb * _API_TIMEOUT_PER_MB)
+        
+        for attempt in range(1, _API_MAX_ATTEMPTS + 1):
+            try:
+                async with self._get_api_semaphore():
+                    documents = await asyncio.wait_for(parser.aload_data(file_path_str), timeout=timeout)
+                logger.info(f"LlamaParse API call completed. Received {len(documents) if documents else 0} document(s)")
+                return documents
+            except _API_RETRYABLE_ERRORS as e:
+                reason = f"timed out after {timeout:.0f} seconds" if isinstance(e, asyncio.TimeoutError) else f"failed: {e}"
+                if attempt == _API_MAX_ATTEMPTS:
+                    logger.error(f"LlamaParse API call {reason} for {doc_path.name}; giving up after {attempt} attempts")
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise TimeoutError("LlamaParse API call timed out. Please try again or use a simpler document.")
+                    raise
+                delay = 2 ** (attempt - 1)
+                logger.warning(f"LlamaParse API call {reason} for {doc_path.name}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"LlamaParse API call failed: {e}")
+                raise
+
+    async def _offload_scan(self, result: Any, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a CPU-bound scan of a parsed result.
+        
+        Scans over large documents run in a worker thread so the event loop keeps
+        serving other requests; small ones run inline, where a thread hop would
+        cost more than the scan itself.
+        """
+        pages = result.get("pages") if isinstance(result, dict) else None
+        if pages and len(pages) >= _OFFLOAD_MIN_PAGES:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _get_api_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding concurrent LlamaParse API calls."""
+        if self._api_semaphore is None:
+            limit = self.config.max_concurrency if self.config else LlamaParseConfig().max_concurrency
+            self._api_semaphore = asyncio.Semaphore(limit)
+        return self._api_semaphore
+
+    async def parse_many(self, doc_paths: List[Path], parsing_instruction: Optional[str] = None,
+                         result_type: Optional[str] = None, extract_images: bool = False) -> List[Any]:
+        """Parse several documents concurrently.
+        
+        API calls overlap up to the configured ``max_concurrency``; results
+        are returned in the same order as ``doc_paths``.
+        
+        Args:
+            doc_paths: Paths to documents
+            parsing_instruction: Custom parsing instructions applied to every document
+            result_type: Override result type ("markdown", "text", "json")
+            extract_images: Whether to extract images
+        """
+        return await asyncio.gather(*(
+            self._parse_document(
+                doc_path,
+                parsing_instruction=parsing_instruction,
+                result_type=result_type,
+                extract_images=extract_images,
+            )
+            for doc_path in doc_paths
+        ))
+
     async def _parse_document(self, doc_path: Path, parsing_instruction: Optional[str] = None, 
-                            result_type: Optional[str] = None, extract_images: bool = False) -> Any:
+                            result_type: Optional[str] = None, extract_images: bool = False,
+                            doc_hash: Optional[str] = None) -> Any:
         """Parse document using LlamaParse with enhanced extraction and caching.
         
         Args:
@@ -526,6 +888,7 @@ class LlamaParseProvider(DocumentProvider):
             parsing_instruction: Custom parsing instructions
             result_type: Override result type ("markdown", "text", "json")
             extract_images: Whether to extract images
+            doc_hash: Content hash of the document; computed once if omitted
         """
         # Initialize if needed
         if not self._initialized and self.config:
@@ -535,18 +898,16 @@ class LlamaParseProvider(DocumentProvider):
             raise RuntimeError("LlamaParse provider not initialized")
 
         # Check cache first
-        cached_result = await self.cache.retrieve_extraction(doc_path, parsing_instruction)
+        if not doc_hash:
+            doc_hash = await self._hash_file(doc_path)
+        cached_result = await self.cache.retrieve_extraction(doc_path, parsing_instruction, doc_hash)
         if cached_result:
             logger.info(f"Using cached LlamaParse extraction for {doc_path.name}")
-            return cached_result
+            return _normalize_pages(cached_result)
         
-        # Update parsing settings
+        parser = self._parser_for(parsing_instruction, result_type)
         if parsing_instruction:
-            self.parser.parsing_instruction = parsing_instruction
             logger.info(f"Parsing document with instruction: {parsing_instruction[:100]}...")
-        
-        if result_type:
-            self.parser.result_type = result_type
 
         logger.info(f"Making LlamaParse API call for document: {doc_path.name}")
         
@@ -585,20 +946,7 @@ class LlamaParseProvider(DocumentProvider):
                 file_path_str = str(temp_path)
                 logger.info(f"Added extension {ext_map[mime_type]} to file for LlamaParse")
         
-        # Parse the document with timeout to prevent hanging
-        try:
-            # Set a reasonable timeout (60 seconds for API call)
-            documents = await asyncio.wait_for(
-                self.parser.aload_data(file_path_str),
-                timeout=60.0
-            )
-            logger.info(f"LlamaParse API call completed. Received {len(documents) if documents else 0} document(s)")
-        except asyncio.TimeoutError:
-            logger.error(f"LlamaParse API call timed out after 60 seconds for {doc_path.name}")
-            raise TimeoutError("LlamaParse API call timed out. Please try again or use a simpler document.")
-        except Exception as e:
-            logger.error(f"LlamaParse API call failed: {e}")
-            raise
+        documents = await self._load_with_retry(parser, file_path_str, doc_path)
         
         # Build enhanced structured format
         result = {
@@ -637,36 +985,39 @@ class LlamaParseProvider(DocumentProvider):
                 # Extract page-level data if available
                 if hasattr(doc, 'pages') and doc.pages:
                     for page in doc.pages:
+                        page = _as_dict(page, _PAGE_FIELDS)
                         page_data = {
-                            "page_num": page.get('page_num', i + 1) if isinstance(page, dict) else getattr(page, 'page_num', i + 1),
-                            "text": page.get('text', '') if isinstance(page, dict) else getattr(page, 'text', ''),
-                            "markdown": page.get('md', '') if isinstance(page, dict) else getattr(page, 'markdown', ''),
+                            "page_num": _as_page_number(page.get('page_num'), i + 1),
+                            "text": page.get('text', ''),
+                            "markdown": page.get('md', page.get('markdown', '')),
                         }
                         
                         # Extract images if requested
-                        page_images = page.get('images', []) if isinstance(page, dict) else getattr(page, 'images', [])
+                        page_images = page.get('images', [])
                         if extract_images and page_images:
                             for img in page_images:
+                                img = _as_dict(img, _IMAGE_FIELDS)
                                 result["images"].append({
                                     "page": page_data["page_num"],
-                                    "data": img.get('data') if isinstance(img, dict) else getattr(img, 'data', None),
-                                    "type": img.get('type') if isinstance(img, dict) else getattr(img, 'type', None),
-                                    "metadata": img.get('metadata', {}) if isinstance(img, dict) else getattr(img, 'metadata', {})
+                                    "data": img.get('data'),
+                                    "type": img.get('type'),
+                                    "metadata": img.get('metadata', {})
                                 })
                         
                         # Extract tables
-                        page_tables = page.get('tables', []) if isinstance(page, dict) else getattr(page, 'tables', [])
+                        page_tables = page.get('tables', [])
                         if page_tables:
                             for table in page_tables:
+                                table = _as_dict(table, _TABLE_FIELDS)
                                 result["tables"].append({
                                     "page": page_data["page_num"],
-                                    "html": table.get('html') if isinstance(table, dict) else getattr(table, 'html', None),
-                                    "data": table.get('data') if isinstance(table, dict) else getattr(table, 'data', None),
-                                    "metadata": table.get('metadata', {}) if isinstance(table, dict) else getattr(table, 'metadata', {})
+                                    "html": table.get('html'),
+                                    "data": table.get('data'),
+                                    "metadata": table.get('metadata', {})
                                 })
                         
                         # Store layout if available
-                        page_layout = page.get('layout') if isinstance(page, dict) else getattr(page, 'layout', None)
+                        page_layout = page.get('layout')
                         if page_layout:
                             page_data["layout"] = page_layout
                         
@@ -691,28 +1042,50 @@ class LlamaParseProvider(DocumentProvider):
                     result["metadata"] = {}
         
         # Store in cache for future use
-        await self.cache.store_extraction(doc_path, result, parsing_instruction)
+        await self.cache.store_extraction(doc_path, result, parsing_instruction, doc_hash)
         logger.info(f"Cached LlamaParse extraction for {doc_path.name}")
         
-        return result
+        # Normalize after caching so the stored extraction does not duplicate page text
+        return _normalize_pages(result)
+
+    def _iter_page_contents(self, result: Any) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, markdown/text) for each page of a parsed result.
+        
+        Falls back to document-level text when no page data is available.
+        """
+        if not isinstance(result, dict):
+            yield 1, str(result)
+            return
+        
+        pages = result.get("pages") or []
+        if pages:
+            for i, page in enumerate(pages, 1):
+                yield page.get("page_num", i), _page_content(page)
+        else:
+            for i, doc in enumerate(result.get("documents") or [], 1):
+                yield i, doc.get("text", "")
 
     def _extract_sections(self, result: Any) -> List[Dict[str, Any]]:
-        """Extract sections from parsed result."""
+        """Extract sections from parsed result.
+        
+        The scan is memoized on the result dict, so TOC, structure and
+        statistics lookups within one request share a single pass.
+        """
+        cached = result.get(_CACHE_PREFIX + "sections") if isinstance(result, dict) else None
+        if cached is not None:
+            return cached
+        
         sections = []
-        # Implementation depends on LlamaParse output structure
-        # This is a simplified version
-        text = str(result)
-        lines = text.split('\n')
-        
-        for line in lines:
-            if line.startswith('#'):
-                level = len(line) - len(line.lstrip('#'))
-                title = line.lstrip('#').strip()
+        for page_num, content in self._iter_page_contents(result):
+            for match in _HEADING_RE.finditer(content):
                 sections.append({
-                    "level": level,
-                    "title": title
+                    "level": len(match.group(1)),
+                    "title": match.group(2),
+                    "page": page_num
                 })
         
+        if isinstance(result, dict):
+            result[_CACHE_PREFIX + "sections"] = sections
         return sections
 
     def _extract_toc(self, result: Any) -> List[Dict[str, Any]]:
@@ -721,6 +1094,9 @@ class LlamaParseProvider(DocumentProvider):
 
     def _build_hierarchy(self, result: Any, include_content: bool) -> Dict[str, Any]:
         """Build document hierarchy (legacy method)."""
+        if isinstance(result, dict) and "pages" in result:
+            return self._build_hierarchy_enhanced(result, include_content)
+        
         hierarchy = {
             "root": {
                 "type": "document",
@@ -745,25 +1121,63 @@ class LlamaParseProvider(DocumentProvider):
     
     def _build_hierarchy_enhanced(self, result: Dict[str, Any], include_content: bool) -> Dict[str, Any]:
         """Build enhanced document hierarchy with rich structure."""
+        return self._traverse_pages(result, include_content)[0]
+    
+    def _traverse_pages(self, result: Dict[str, Any],
+                        include_content: bool) -> Tuple[Dict[str, Any], List[Dict[str, Any]], int]:
+        """Walk the pages once, building everything ``map`` needs per page.
+        
+        Returns:
+            The enhanced hierarchy, the per-page structure summary, and the
+            total number of sections found across pages
+        """
+        pages = result.get("pages") or []
+        metadata = result.get("metadata") or {}
+        
         hierarchy = {
             "root": {
                 "type": "document",
-                "title": result.get("metadata", {}).get("title", "Document"),
-                "metadata": result.get("metadata", {}),
+                "title": metadata.get("title", "Document"),
+                "metadata": metadata,
                 "children": []
             }
         }
         
+        # Bucket tables and images by page once instead of filtering per page
+        tables_by_page = _resources_by_page(result, "tables")
+        images_by_page = _resources_by_page(result, "images")
+        
+        page_structure = []
+        section_count = 0
+        
         # Build hierarchy from pages
-        for page in result.get("pages", []):
+        for page in pages:
+            # Read each page field once per iteration
+            get = page.get
+            page_num = get("page_num", 1)
+            layout = get("layout")
+            page_tables = tables_by_page.get(page_num, ())
+            page_images = images_by_page.get(page_num, ())
+            
+            page_info = {
+                "pageNumber": page_num,
+                "hasText": bool(get("text")),
+                "hasImages": bool(page_images),
+                "hasTables": bool(page_tables),
+            }
+            if layout:
+                page_info["layout"] = layout
+            page_structure.append(page_info)
+            
             page_node = {
                 "type": "page",
-                "pageNumber": page.get("page_num", 1),
+                "pageNumber": page_num,
                 "children": []
             }
             
             # Extract sections from page content
             page_sections = self._extract_sections_from_page(page)
+            section_count += len(page_sections)
             for section in page_sections:
                 section_node = {
                     "type": "section",
@@ -779,7 +1193,6 @@ class LlamaParseProvider(DocumentProvider):
                 page_node["children"].append(section_node)
             
             # Add table nodes
-            page_tables = [t for t in result.get("tables", []) if t.get("page") == page.get("page_num")]
             for i, table in enumerate(page_tables, 1):
                 table_node = {
                     "type": "table",
@@ -791,7 +1204,6 @@ class LlamaParseProvider(DocumentProvider):
                 page_node["children"].append(table_node)
             
             # Add image nodes
-            page_images = [img for img in result.get("images", []) if img.get("page") == page.get("page_num")]
             for i, img in enumerate(page_images, 1):
                 image_node = {
                     "type": "image",
@@ -803,64 +1215,63 @@ class LlamaParseProvider(DocumentProvider):
             
             hierarchy["root"]["children"].append(page_node)
         
-        return hierarchy
+        return hierarchy, page_structure, section_count
     
     def _extract_sections_from_page(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract sections from a single page."""
+        """Extract sections from a single page, memoized on the page dict."""
+        cached = page.get(_CACHE_PREFIX + "sections")
+        if cached is not None:
+            return cached
+        
         sections = []
-        content = page.get("markdown", page.get("text", ""))
-        lines = content.split('\n')
-        
-        current_content = []
-        for line in lines:
-            if line.startswith('#'):
-                # Save previous section if exists
-                if current_content and sections:
-                    sections[-1]["content"] = "\n".join(current_content).strip()
-                current_content = []
-                
-                # Extract new section
-                level = len(line) - len(line.lstrip('#'))
-                title = line.lstrip('#').strip()
-                sections.append({
-                    "level": level,
-                    "title": title,
-                    "content": ""
-                })
-            else:
-                current_content.append(line)
+        content = _page_content(page)
         
-        # Save last section content
-        if current_content and sections:
-            sections[-1]["content"] = "\n".join(current_content).strip()
+        # Each section's body is a single slice from the end of its heading to
+        # the start of the next one (or the end of the page)
+        headings = list(_HEADING_RE.finditer(content))
+        ends = [match.start() for match in headings[1:]]
+        ends.append(len(content))
+        for match, end in zip(headings, ends):
+            sections.append({
+                "level": len(match.group(1)),
+                "title": match.group(2),
+                "content": content[match.end():end].strip()
+            })
         
+        page[_CACHE_PREFIX + "sections"] = sections
         return sections
 
     def _extract_resources(self, result: Any) -> Dict[str, List[Any]]:
-        """Extract document resources (images, tables, etc.)."""
+        """Extract document resources (images, tables, etc.).
+        
+        Memoized on the result dict like sections and entities.
+        """
+        cached = result.get(_CACHE_PREFIX + "resources") if isinstance(result, dict) else None
+        if cached is not None:
+            return cached
+        
         resources = {
             "images": [],
             "tables": [],
             "equations": []
         }
         
-        # Parse result for resources
-        # This is simplified - actual implementation would parse LlamaParse output
-        text = str(result)
-        
-        # Look for table indicators
-        if "table" in text.lower():
-            resources["tables"].append({
-                "id": "table-1",
-                "description": "Detected table"
-            })
-        
-        # Look for image indicators
-        if "image" in text.lower() or "figure" in text.lower():
-            resources["images"].append({
-                "id": "img-1",
-                "description": "Detected image"
-            })
+        if isinstance(result, dict):
+            for i, table in enumerate(result.get("tables") or [], 1):
+                resources["tables"].append({
+                    "id": f"table-{i}",
+                    "page": table.get("page"),
+                    "description": "Detected table"
+                })
+            
+            for i, img in enumerate(result.get("images") or [], 1):
+                resources["images"].append({
+                    "id": f"img-{i}",
+                    "page": img.get("page"),
+                    "description": "Detected image"
+                })
+            
+            result[_CACHE_PREFIX + "resources"] = resources
         
         return resources
 
@@ -871,91 +1282,136 @@ class LlamaParseProvider(DocumentProvider):
         return references
 
     def _find_section(self, result: Any, section_name: str) -> Optional[str]:
-        """Find a specific section in the document."""
-        sections = self._extract_sections(result)
-        for section in sections:
-            if section_name.lower() in section["title"].lower():
-                # Would extract actual section content
-                return f"Content of section: {section['title']}"
+        """Find a specific section in the document.
+        
+        Once sections have been extracted for this result, lookups go through a
+        memoized index of lowercased titles; otherwise the pages are scanned
+        only up to the first matching heading.
+        """
+        section_name_lower = section_name.lower()
+        
+        if isinstance(result, dict) and _CACHE_PREFIX + "sections" in result:
+            titles = result.get(_CACHE_PREFIX + "section_titles")
+            if titles is None:
+                titles = [(s["title"].lower(), s["title"]) for s in result[_CACHE_PREFIX + "sections"]]
+                result[_CACHE_PREFIX + "section_titles"] = titles
+            for title_lower, title in titles:
+                if section_name_lower in title_lower:
+                    return f"Content of section: {title}"
+            return None
+        
+        # Stop at the first matching heading instead of collecting all sections
+        for _, content in self._iter_page_contents(result):
+            for match in _HEADING_RE.finditer(content):
+                title = match.group(2)
+                if section_name_lower in title.lower():
+                    # Would extract actual section content
+                    return f"Content of section: {title}"
         return None
 
     def _search_text(self, result: Any, query: str) -> Optional[Dict[str, Any]]:
         """Search for text in the document."""
-        text = str(result)
-        query_lower = query.lower()
-        text_lower = text.lower()
+        # Lowercasing ASCII text keeps every offset in place, so ASCII pages
+        # are searched with str.find on a lowercased copy, which is several
+        # times faster than an IGNORECASE regex. Other pages use the regex so
+        # positions still index straight into the original text.
+        # The query regex is only compiled once a page actually needs it.
+        query_lower = query.lower() if query.isascii() else None
+        pattern = None
         
-        pos = text_lower.find(query_lower)
-        if pos != -1:
+        for page_num, text in self._iter_page_contents(result):
+            if query_lower is not None and text.isascii():
+                pos = text.lower().find(query_lower)
+                if pos < 0:
+                    continue
+                match_end = pos + len(query_lower)
+            else:
+                if pattern is None:
+                    pattern = re.compile(re.escape(query), re.IGNORECASE)
+                match = pattern.search(text)
+                if not match:
+                    continue
+                pos, match_end = match.span()
+            
             # Extract context around the match
             start = max(0, pos - 100)
-            end = min(len(text), pos + len(query) + 100)
+            end = min(len(text), match_end + 100)
             return {
                 "content": text[start:end],
-                "location": {"position": pos, "type": "text"}
+                "location": {"page": page_num, "position": pos, "type": "text"}
             }
         return None
 
+    def _join_text(self, result: Any) -> str:
+        """Join the plain text of all documents (or pages) of a parsed result.
+        
+        The joined text is memoized on the result dict, so the entity and key
+        point scans of one request share a single copy.
+        """
+        if not isinstance(result, dict):
+            return str(result)
+        
+        text = result.get(_CACHE_PREFIX + "text")
+        if text is None:
+            if "documents" in result:
+                text = " ".join(doc.get("text", "") for doc in result["documents"])
+            elif "pages" in result:
+                text = " ".join(page.get("text", "") for page in result["pages"])
+            else:
+                text = ""
+            result[_CACHE_PREFIX + "text"] = text
+        return text
+
     def _extract_entities(self, result: Any) -> List[Dict[str, Any]]:
         """Extract named entities from the parsed result."""
+        cached = result.get(_CACHE_PREFIX + "entities") if isinstance(result, dict) else None
+        if cached is not None:
+            return cached
+        
         entities = []
         seen = set()
         
         # When LlamaParse is given entity extraction instructions, results are in documents
         if isinstance(result, dict) and "documents" in result:
             for doc in result.get("documents", []):
-                text = doc.get("text", "")
                 # Parse lines that look like entity listings
-                lines = text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and line.startswith('-'):
-                        entity_text = line.lstrip('-').strip()
-                        if entity_text and entity_text not in seen:
-                            # Determine entity type based on content
-                            entity_type = "ORGANIZATION"  # Default
-                            if "Service" in entity_text or "Department" in entity_text or "Commission" in entity_text:
-                                entity_type = "ORGANIZATION"
-                            elif "Act" in entity_text or "FATCA" in entity_text:
-                                entity_type = "LEGISLATION"
-                            
-                            entities.append({
-                                "text": entity_text,
-                                "type": entity_type,
-                                "confidence": 0.8
-                            })
-                            seen.add(entity_text)
+                for match in _ENTITY_LISTING_RE.finditer(doc.get("text", "")):
+                    entity_text = match.group(1)
+                    if entity_text and entity_text not in seen:
+                        # Determine entity type based on content
+                        entity_type = "ORGANIZATION"  # Default
+                        if "Service" in entity_text or "Department" in entity_text or "Commission" in entity_text:
+                            entity_type = "ORGANIZATION"
+                        elif "Act" in entity_text or "FATCA" in entity_text:
+                            entity_type = "LEGISLATION"
+                        
+                        entities.append({
+                            "text": entity_text,
+                            "type": entity_type,
+                            "confidence": 0.8
+                        })
+                        seen.add(entity_text)
         
         # If no entities found, try pattern matching
         if not entities:
-            import re
-            all_text = ""
-            if isinstance(result, dict):
-                if "documents" in result:
-                    all_text = " ".join(doc.get("text", "") for doc in result["documents"])
-                elif "pages" in result:
-                    all_text = " ".join(page.get("text", "") for page in result["pages"])
-            else:
-                all_text = str(result)
-            
-            # Find capitalized words and acronyms
-            patterns = [
-                r'\b[A-Z]{2,}\b',  # Acronyms like IRS, SSA
-                r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',  # Proper names
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, all_text)
-                for word in matches:
-                    if word not in seen and len(word) > 2 and word not in ["The", "This", "That"]:
-                        entities.append({
-                            "text": word,
-                            "type": "UNKNOWN",
-                            "confidence": 0.6
-                        })
-                        seen.add(word)
+            # Find capitalized words and acronyms in a single pass, using an
+            # insertion-ordered dict as the seen set and stopping at 50 hits
+            words: Dict[str, None] = {}
+            text = self._join_text(result)
+            entity_re = _ENTITY_ASCII_RE if text.isascii() else _ENTITY_RE
+            for match in entity_re.finditer(text):
+                word = match.group()
+                # Acronyms are already 3+ letters; this drops words like "It"
+                if len(word) > 2 and word not in _ENTITY_STOPWORDS:
+                    words[word] = None
+                    if len(words) >= 50:
+                        break
+            entities = [{"text": word, "type": "UNKNOWN", "confidence": 0.6} for word in words]
         
-        return entities[:50]  # Limit to top 50
+        entities = entities[:50]  # Limit to top 50
+        if isinstance(result, dict):
+            result[_CACHE_PREFIX + "entities"] = entities
+        return entities
 
     def _extract_relationships(self, result: Any) -> List[Dict[str, Any]]:
         """Extract entity relationships."""
@@ -963,53 +1419,61 @@ class LlamaParseProvider(DocumentProvider):
         # Would analyze entities and their relationships
         return relationships
 
-    def _extract_key_points(self, result: Any) -> List[str]:
-        """Extract key points from the document."""
-        key_points = []
+    def _iter_key_point_candidates(self, result: Any) -> Iterator[str]:
+        """Yield candidate key point lines from documents, then pages."""
+        if not isinstance(result, dict):
+            return
         
         # When LlamaParse is given analysis instructions, it returns results in documents
-        if isinstance(result, dict) and "documents" in result:
-            # Extract from all document texts
-            for doc in result.get("documents", []):
-                text = doc.get("text", "")
-                # Look for bullet points, lists, or key statements
-                lines = text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and (
-                        line.startswith(('•', '-', '*', '1.', '2.', '3.')) or
-                        len(line) > 10  # Include substantial lines as potential key points
-                    ):
-                        cleaned = line.lstrip('•-*123456789. ').strip()
-                        if cleaned and cleaned not in key_points:
-                            key_points.append(cleaned)
+        for doc in result.get("documents", []):
+            # Look for bullet points, lists, or key statements
+            for line in doc.get("text", "").split('\n'):
+                line = line.strip()
+                # Substantial lines are potential key points; the length test is
+                # cheaper than the prefix test, so it runs first
+                if len(line) > 10 or line.startswith(_BULLET_PREFIXES):
+                    # The marker run includes whitespace, so slicing past it
+                    # leaves an already-trimmed key point
+                    marker = _BULLET_PREFIX_RE.match(line)
+                    cleaned = line[marker.end():] if marker else line
+                    if cleaned:
+                        yield cleaned
         
         # Also check pages for content
-        if isinstance(result, dict) and "pages" in result:
-            for page in result.get("pages", []):
-                text = page.get("text", "") or page.get("markdown", "")
-                lines = text.split('\n')
-                for line in lines:
+        for page in result.get("pages", []):
+            text = page.get("text", "") or page.get("markdown", "")
+            for line in text.split('\n'):
+                # Stripping can only shorten a line, so short raw lines are
+                # rejected without allocating a stripped copy
+                if len(line) > 10:
                     line = line.strip()
-                    if line and len(line) > 10 and line not in key_points:
-                        key_points.append(line)
+                    if len(line) > 10:
+                        yield line
+
+    def _extract_key_points(self, result: Any) -> List[str]:
+        """Extract key points from the document."""
+        cached = result.get(_CACHE_PREFIX + "key_points") if isinstance(result, dict) else None
+        if cached is not None:
+            return cached
+        
+        # Stop reading the document as soon as we have enough key points,
+        # using an insertion-ordered dict as the seen set
+        seen: Dict[str, None] = {}
+        for candidate in self._iter_key_point_candidates(result):
+            seen[candidate] = None
+            if len(seen) >= 10:
+                break
+        key_points = list(seen)
         
         # If we have no key points but have text, extract first few meaningful lines
         if not key_points:
-            all_text = ""
-            if isinstance(result, dict):
-                if "documents" in result:
-                    all_text = " ".join(doc.get("text", "") for doc in result["documents"])
-                elif "pages" in result:
-                    all_text = " ".join(page.get("text", "") for page in result["pages"])
-            else:
-                all_text = str(result)
-            
-            # Split into sentences and take the first few
-            sentences = [s.strip() for s in all_text.split('.') if s.strip()]
-            key_points = sentences[:5]
+            # Take the first few sentences, scanning only as far as needed
+            sentences = (match.group().strip() for match in _SENTENCE_RE.finditer(self._join_text(result)))
+            key_points = list(islice(filter(None, sentences), 5))
         
-        return key_points[:10]  # Limit to top 10
+        if isinstance(result, dict):
+            result[_CACHE_PREFIX + "key_points"] = key_points
+        return key_points
 
     def _analyze_sentiment(self, result: Any) -> Dict[str, Any]:
         """Analyze document sentiment."""
@@ -1022,73 +1486,103 @@ class LlamaParseProvider(DocumentProvider):
 
     def _analyze_structure(self, result: Any) -> Dict[str, Any]:
         """Analyze document structure."""
+        # Sections are memoized on the result, so this reuses an earlier walk
         sections = self._extract_sections(result)
+        
         return {
             "type": "structured",
             "sections": len(sections),
-            "depth": max([s["level"] for s in sections]) if sections else 0,
+            "depth": max((section["level"] for section in sections), default=0),
             "organization": "hierarchical"
         }
 
     def _format_as_markdown(self, result: Any, extraction_targets: List[str]) -> str:
         """Format result as markdown (legacy method for compatibility)."""
-        if isinstance(result, dict):
-            if "documents" in result and result["documents"]:
-                return result["documents"][0].get("text", "")
-            elif "pages" in result:
-                return "\n\n---\n\n".join([page.get("markdown", page.get("text", "")) for page in result["pages"]])
+        if isinstance(result, dict) and "pages" in result:
+            return self._format_as_markdown_enhanced(result, extraction_targets)
+        
+        if isinstance(result, dict) and result.get("documents"):
+            return result["documents"][0].get("text", "")
         return str(result)
     
     def _format_as_markdown_enhanced(self, result: Dict[str, Any], extraction_targets: List[str]) -> str:
         """Format result as enhanced markdown with all requested content."""
-        markdown_parts = []
+        return "\n".join(self._iter_markdown_enhanced(result, extraction_targets))
+    
+    def stream_markdown_enhanced(self, result: Dict[str, Any], extraction_targets: List[str],
+                                 fp: TextIO) -> None:
+        """Write enhanced markdown for a parsed result to a text stream.
+        
+        Produces the same text as ``_format_as_markdown_enhanced`` while
+        holding at most one page of output in memory, so very large documents
+        can be written straight to a file or socket.
+        """
+        write = fp.write
+        chunks = self._iter_markdown_enhanced(result, extraction_targets)
+        first = next(chunks, None)
+        if first is None:
+            return
+        write(first)
+        for chunk in chunks:
+            write("\n")
+            write(chunk)
+    
+    def _iter_markdown_enhanced(self, result: Dict[str, Any], extraction_targets: List[str]) -> Iterator[str]:
+        """Yield the enhanced markdown output as newline-separated chunks.
+        
+        Fixed headings are emitted together with the text that follows them,
+        so the join inserts one separator per block rather than per fragment.
+        """
+        pages = result.get("pages") or []
+        metadata = result.get("metadata") or {}
         
         # Add document metadata if requested
-        if "metadata" in extraction_targets and result.get("metadata"):
-            markdown_parts.append("# Document Metadata\n")
-            for key, value in result["metadata"].items():
-                markdown_parts.append(f"- **{key}**: {value}")
-            markdown_parts.append("\n")
+        if "metadata" in extraction_targets and metadata:
+            entries = "\n".join(f"- **{key}**: {value}" for key, value in metadata.items())
+            yield f"# Document Metadata\n\n{entries}\n\n"
+        
+        # Bucket tables and images by page once instead of filtering per page
+        tables_by_page = _resources_by_page(result, "tables") if "tables" in extraction_targets else {}
+        images_by_page = _resources_by_page(result, "images") if "images" in extraction_targets else {}
         
         # Add page content
-        for page in result.get("pages", []):
+        for page in pages:
             page_num = page.get("page_num", 1)
-            markdown_parts.append(f"## Page {page_num}\n")
             
             # Use markdown content if available, otherwise fall back to text
-            content = page.get("markdown", page.get("text", ""))
+            content = _page_content(page)
             if content:
-                markdown_parts.append(content)
+                yield f"## Page {page_num}\n\n{content}"
+            else:
+                yield f"## Page {page_num}\n"
             
             # Add tables if extracted
-            if "tables" in extraction_targets:
-                page_tables = [t for t in result.get("tables", []) if t.get("page") == page_num]
-                for table in page_tables:
-                    markdown_parts.append("\n### Table\n")
-                    if table.get("html"):
-                        markdown_parts.append(f"```html\n{table['html']}\n```\n")
-                    elif table.get("data"):
-                        markdown_parts.append(f"```\n{table['data']}\n```\n")
+            for table in tables_by_page.get(page_num, ()):
+                if table.get("html"):
+                    yield f"\n### Table\n\n```html\n{table['html']}\n```\n"
+                elif table.get("data"):
+                    yield f"\n### Table\n\n```\n{table['data']}\n```\n"
+                else:
+                    yield "\n### Table\n"
             
             # Add image references if extracted
-            if "images" in extraction_targets:
-                page_images = [img for img in result.get("images", []) if img.get("page") == page_num]
-                if page_images:
-                    markdown_parts.append("\n### Images\n")
-                    for i, img in enumerate(page_images, 1):
-                        img_type = img.get("type", "image")
-                        metadata = img.get("metadata", {})
-                        markdown_parts.append(f"- Image {i} ({img_type})")
-                        if metadata:
-                            for key, value in metadata.items():
-                                markdown_parts.append(f"  - {key}: {value}")
+            page_images = images_by_page.get(page_num, ())
+            if page_images:
+                yield "\n### Images\n"
+                for i, img in enumerate(page_images, 1):
+                    yield f"- Image {i} ({img.get('type', 'image')})"
+                    img_metadata = img.get("metadata", {})
+                    if img_metadata:
+                        for key, value in img_metadata.items():
+                            yield f"  - {key}: {value}"
             
-            markdown_parts.append("\n---\n")
-        
-        return "\n".join(markdown_parts)
+            yield "\n---\n"
 
     def _format_as_json(self, result: Any, extraction_targets: List[str]) -> Dict[str, Any]:
         """Format result as JSON (legacy method for compatibility)."""
+        if isinstance(result, dict) and "pages" in result:
+            return self._format_as_json_enhanced(result, extraction_targets)
+        
         output = {}
         
         if "text" in extraction_targets:
@@ -1098,55 +1592,60 @@ class LlamaParseProvider(DocumentProvider):
             if isinstance(result, dict) and "metadata" in result:
                 output["metadata"] = result["metadata"]
         
-        if "tables" in extraction_targets:
-            output["tables"] = self._extract_resources(result).get("tables", [])
-        
-        if "images" in extraction_targets:
-            output["images"] = self._extract_resources(result).get("images", [])
+        if "tables" in extraction_targets or "images" in extraction_targets:
+            resources = self._extract_resources(result)
+            if "tables" in extraction_targets:
+                output["tables"] = resources["tables"]
+            if "images" in extraction_targets:
+                output["images"] = resources["images"]
         
         return output
     
     def _format_as_json_enhanced(self, result: Dict[str, Any], extraction_targets: List[str]) -> Dict[str, Any]:
         """Format result as enhanced JSON with structured data."""
+        pages = result.get("pages") or []
+        tables = result.get("tables") or []
+        images = result.get("images") or []
+        
         output = {}
         
         # Add text content
         if "text" in extraction_targets:
-            output["text"] = []
-            for page in result.get("pages", []):
-                output["text"].append({
-                    "page": page.get("page_num", 1),
-                    "content": page.get("text", ""),
-                    "markdown": page.get("markdown", "")
-                })
+            text_out = [None] * len(pages)
+            for i, page in enumerate(pages):
+                get = page.get
+                text_out[i] = {
+                    "page": get("page_num", 1),
+                    "content": get("text", ""),
+                    "markdown": get("markdown", "")
+                }
+            output["text"] = text_out
         
         # Add metadata
         if "metadata" in extraction_targets:
-            output["metadata"] = result.get("metadata", {})
+            output["metadata"] = result.get("metadata") or {}
         
         # Add tables with full structure
-        if "tables" in extraction_targets and result.get("tables"):
-            output["tables"] = result["tables"]
+        if "tables" in extraction_targets and tables:
+            output["tables"] = tables
         
         # Add images with metadata
-        if "images" in extraction_targets and result.get("images"):
-            output["images"] = result["images"]
+        if "images" in extraction_targets and images:
+            output["images"] = images
         
         # Add layout information if available
         if "layout" in extraction_targets:
-            output["layout"] = []
-            for page in result.get("pages", []):
-                if page.get("layout"):
-                    output["layout"].append({
-                        "page": page.get("page_num", 1),
-                        "layout": page["layout"]
-                    })
+            output["layout"] = [
+                {"page": page.get("page_num", 1), "layout": layout}
+                for page in pages
+                if (layout := page.get("layout"))
+            ]
         
         # Add summary statistics
         output["statistics"] = {
-            "totalPages": len(result.get("pages", [])),
-            "totalTables": len(result.get("tables", [])),
-            "totalImages": len(result.get("images", [])),
+            "totalPages": len(pages),
+            "totalTables": len(tables),
+            "totalImages": len(images),
             "extractionTargets": extraction_targets
         }
         
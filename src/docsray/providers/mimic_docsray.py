@@ -2,17 +2,31 @@
 
 import asyncio
 import hashlib
+import heapq
 import logging
+import math
 import os
+import re
+import sys
 import tempfile
+from bisect import bisect_right
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import accumulate, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Deque, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-from pydantic import BaseModel
 
 from ..config import MimicDocsrayConfig
-from ..utils.documents import download_document, get_document_format, get_local_document, is_url
+from ..utils.documents import (
+    calculate_file_hash,
+    download_document,
+    get_document_format,
+    get_local_document,
+    is_url,
+)
 from .base import (
     Document,
     DocumentProvider,
@@ -27,8 +41,97 @@ from .base import (
 
 logger = logging.getLogger(__name__)
 
+# Vector count above which a flat FAISS index is rebuilt as IVF-PQ when
+# vector_index_type is "ivfpq"; below it an exhaustive scan is cheap enough
+_IVFPQ_MIN_VECTORS = 10000
+# Inverted lists probed per IVF-PQ query
+_IVFPQ_NPROBE = 16
+
+# Number of recent query embeddings kept by RAGEngine
+_QUERY_CACHE_SIZE = 256
+
+# Number of recent semantic search results kept by RAGEngine, and the cosine
+# similarity above which a query reuses the results of a cached one. Unrelated
+# questions about the same document easily score 0.4-0.7, so only near
+# duplicates (rewordings, case and punctuation changes) count as hits
+_RESULT_CACHE_SIZE = 256
+_RESULT_CACHE_MIN_SIMILARITY = 0.95
+
+# Number of documents whose extracted text MimicDocsrayProvider keeps
+_TEXT_CACHE_SIZE = 32
+
+# Entity patterns for _extract_entities_advanced, compiled once and applied
+# in this order: emails, dates (simple pattern), monetary amounts
+_ENTITY_PATTERNS = (
+    ("EMAIL", re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'), 0.9),
+    ("DATE", re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'), 0.8),
+    ("MONEY", re.compile(r'\$[\d,]+\.?\d*'), 0.85),
+)
 
-class ChunkInfo(BaseModel):
+# Key point indicators for _extract_key_points_advanced, matched anywhere in
+# a lowercased sentence in one scan
+_KEY_POINT_RE = re.compile(r'important|key|critical|must|should')
+
+# Sentiment indicator words for _analyze_sentiment_advanced
+_POSITIVE_WORDS = frozenset({'good', 'great', 'excellent', 'positive', 'success'})
+_NEGATIVE_WORDS = frozenset({'bad', 'poor', 'negative', 'failure', 'problem'})
+
+# Candidate documents analysed at once in the fine phase of search
+_FINE_ANALYSIS_CONCURRENCY = os.cpu_count() or 1
+
+# Words per page when navigating a document by page number, and a pattern
+# matching one page of words with the whitespace that follows it
+_WORDS_PER_PAGE = 500
+_PAGE_WORDS_RE = re.compile(r'(?:\S+\s+){%d}' % _WORDS_PER_PAGE)
+_LEADING_SPACE_RE = re.compile(r'\s*')
+
+# Document extensions matched by the basic filename search
+_BASIC_SEARCH_SUFFIXES = ('.pdf', '.txt', '.md', '.docx')
+
+# Longest image side passed to Tesseract: an A4 page scanned at 300 dpi
+_OCR_MAX_IMAGE_SIDE = 3508
+
+# Sentence terminators used to split text before chunking
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
+
+def _find_ignore_case(text: str, query: str) -> int:
+    """Index of the first case-insensitive occurrence of query in text, or -1."""
+    # Lowercasing ASCII keeps every offset in place, and one str.find on the
+    # lowered copy beats an IGNORECASE regex; other text uses the regex so the
+    # index still points into the original string
+    if text.isascii() and query.isascii():
+        return text.lower().find(query.lower())
+    match = re.search(re.escape(query), text, re.IGNORECASE)
+    return match.start() if match else -1
+
+
+def _iter_files(root: str, suffixes: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+    """Recursively yield files under root whose lowercased name ends with one of suffixes."""
+    # os.scandir gets entry types from the directory listing, so unlike
+    # rglob("*") plus is_file() most entries cost no extra stat; symlinked
+    # directories are not followed, as with rglob
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError as e:
+        logger.debug(f"Skipping unreadable directory {root}: {e}")
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        elif entry.name.lower().endswith(suffixes) and entry.is_file():
+            yield entry
+    for subdir in subdirs:
+        yield from _iter_files(subdir, suffixes)
+
+
+# A plain dataclass is much cheaper to build than a validated model, and one
+# is created per chunk; slots (Python 3.10+) also drop the per-instance dict
+@dataclass(**({"slots": True} if sys.version_info >= (3, 10) else {}))
+class ChunkInfo:
     """Information about a document chunk."""
 
     chunk_id: str
@@ -36,8 +139,8 @@ class ChunkInfo(BaseModel):
     page_num: Optional[int] = None
     start_pos: int = 0
     end_pos: int = 0
-    metadata: Dict[str, Any] = {}
-    embedding: Optional[List[float]] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    embedding: Optional[np.ndarray] = None
     semantic_score: Optional[float] = None
 
 
@@ -49,10 +152,38 @@ class RAGEngine:
         self.embedding_model = None
         self.vector_store = None
         self.chunks: List[ChunkInfo] = []
+        # Chunk embeddings, one row per embedded chunk, so memory-based
+        # search scores every chunk with one matrix product. The matrix is a
+        # view of the filled rows of a buffer that grows geometrically, so
+        # adding a document doesn't copy every earlier embedding
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_buffer: Optional[np.ndarray] = None
+        # Chunks with a row in _embedding_matrix and the vector store, in row
+        # order, so search maps rows straight to chunks. Chunks created without
+        # a model are only in self.chunks, for keyword search
+        self._embedded_chunks: List[ChunkInfo] = []
+        # Content digest -> row of _embedding_matrix holding its embedding
+        self._embedding_rows: Dict[bytes, int] = {}
+        # Lowercased word sets, one per entry of self.chunks, tokenized on the
+        # first keyword search rather than on every query
+        self._chunk_tokens: List[FrozenSet[str]] = []
+        # FAISS GPU resources must outlive the GPU index built from them
+        self._gpu_resources = None
+        # LRU of recent query embeddings, so repeated searches skip the model
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # LRU of recent search results, so a query whose embedding is nearly
+        # identical to a cached one skips the index. Slot i holds the query
+        # embedding in row i of _result_vectors and maps to (top_k, results
+        # with their scores); slots are filled in order and reused on eviction
+        self._result_vectors: Optional[np.ndarray] = None
+        self._result_cache: "OrderedDict[int, Tuple[int, List[Tuple[ChunkInfo, float]]]]" = OrderedDict()
         self._initialized = False
 
     async def initialize(self) -> None:
         """Initialize the RAG engine with embeddings and vector store."""
+        self._query_cache.clear()
+        self._result_cache.clear()
+        self._embedding_rows.clear()
         try:
             if self.config.rag_enabled:
                 # Initialize embedding model
@@ -66,6 +197,12 @@ class RAGEngine:
                     try:
                         import faiss
                         self.vector_store = faiss.IndexFlatIP(384)  # Default embedding size
+                        # The embedding model already picks CUDA by itself;
+                        # the FAISS index has to be moved explicitly
+                        if self.config.use_gpu and hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+                            self._gpu_resources = faiss.StandardGpuResources()
+                            self.vector_store = faiss.index_cpu_to_gpu(self._gpu_resources, 0, self.vector_store)
+                            logger.info("Moved FAISS vector store to GPU")
                         logger.info("Initialized FAISS vector store")
                     except ImportError:
                         logger.warning("FAISS not available, using memory-based search")
@@ -81,40 +218,91 @@ class RAGEngine:
 
     async def create_chunks(self, text: str, document_path: Path) -> List[ChunkInfo]:
         """Create semantic chunks from text using advanced chunking strategies."""
+        chunks = self._split_into_chunks(text, document_path)
+
+        # Generate embeddings if model available. Embeddings are only read by
+        # semantic_search, which falls back to keyword search unless
+        # initialization completed; don't compute them for an engine whose
+        # initialization failed part way through
+        embeddings = None
+        if self._initialized and self.embedding_model and chunks:
+            digests = self._chunk_digests(chunks)
+            embeddings = self._embed_chunks(chunks, digests)
+
+            # Rows of the batch array, not Python lists: a list of floats costs
+            # ~7x the memory and nothing downstream needs one
+            for chunk, embedding in zip(chunks, embeddings):
+                chunk.embedding = embedding
+
+            base = 0 if self._embedding_matrix is None else len(self._embedding_matrix)
+            for row, digest in enumerate(digests, base):
+                self._embedding_rows.setdefault(digest, row)
+            self._append_embeddings(embeddings)
+            self._embedded_chunks.extend(chunks)
+            # Newly stored embeddings can outrank anything a cached search
+            # returned; scoring text with score_text stores nothing, so fine
+            # search leaves the cache alone
+            self._result_cache.clear()
+
+        self.chunks.extend(chunks)
+
+        # Add to vector store if available
+        if self.vector_store and embeddings is not None:
+            self.vector_store.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+            logger.info(f"Added {len(embeddings)} embeddings to vector store")
+            self._maybe_upgrade_index()
+
+        return chunks
+
+    async def score_text(self, query: str, text: str, document_path: Path) -> Optional[float]:
+        """Highest cosine similarity between query and the chunks of text, without indexing them."""
+        if not self._initialized or not self.embedding_model:
+            return None
+        chunks = self._split_into_chunks(text, document_path)
+        if not chunks:
+            return None
+        embeddings = self._embed_chunks(chunks, self._chunk_digests(chunks))
+        return float(np.max(embeddings @ self._encode_query(query)))
+
+    def _split_into_chunks(self, text: str, document_path: Path) -> List[ChunkInfo]:
+        """Split text into overlapping sentence-aware chunks, without embeddings."""
         chunks = []
 
         # Strategy 1: Sentence-aware chunking
         sentences = self._split_into_sentences(text)
-        current_chunk = ""
+        # cum[k] is len(" " + " ".join(sentences[:k])), so the length of a chunk
+        # is a difference of two entries and chunk ends can be bisected for
+        # instead of growing one string sentence by sentence
+        cum = [0, *accumulate(len(sentence) + 1 for sentence in sentences)]
+        head = ""  # overlap carried over from the previous chunk
+        start = 0  # first sentence after the head
         current_pos = 0
 
-        for i, sentence in enumerate(sentences):
-            if len(current_chunk) + len(sentence) > self.config.chunk_size and current_chunk:
-                # Create chunk
-                chunk_id = f"{document_path.stem}_chunk_{len(chunks)}"
-                chunk_info = ChunkInfo(
-                    chunk_id=chunk_id,
-                    content=current_chunk.strip(),
-                    start_pos=current_pos,
-                    end_pos=current_pos + len(current_chunk),
-                    metadata={"strategy": "sentence_aware", "sentence_count": i}
-                )
-
-                # Generate embedding if model available
-                if self.embedding_model:
-                    embedding = self.embedding_model.encode(current_chunk.strip())
-                    chunk_info.embedding = embedding.tolist()
+        while True:
+            # First sentence that no longer fits after head + sentences[start:i]
+            i = bisect_right(cum, self.config.chunk_size - len(head) + cum[start] + 1, lo=start + 2) - 1
+            if i >= len(sentences):
+                break
 
-                chunks.append(chunk_info)
+            # Create chunk
+            current_chunk = head + " " + " ".join(sentences[start:i])
+            chunk_id = f"{document_path.stem}_chunk_{len(chunks)}"
+            chunk_info = ChunkInfo(
+                chunk_id=chunk_id,
+                content=current_chunk.strip(),
+                start_pos=current_pos,
+                end_pos=current_pos + len(current_chunk),
+                metadata={"strategy": "sentence_aware", "sentence_count": i}
+            )
+            chunks.append(chunk_info)
 
-                # Start new chunk with overlap
-                overlap_text = self._get_overlap_text(current_chunk, self.config.chunk_overlap)
-                current_chunk = overlap_text + " " + sentence
-                current_pos += len(current_chunk) - len(overlap_text)
-            else:
-                current_chunk += " " + sentence
+            # Start new chunk with overlap
+            head = self._get_overlap_text(current_chunk, self.config.chunk_overlap)
+            start = i
+            current_pos += len(sentences[i]) + 1
 
         # Add final chunk
+        current_chunk = head + " " + " ".join(sentences[start:]) if sentences else ""
         if current_chunk.strip():
             chunk_id = f"{document_path.stem}_chunk_{len(chunks)}"
             chunk_info = ChunkInfo(
@@ -124,11 +312,6 @@ class RAGEngine:
                 end_pos=current_pos + len(current_chunk),
                 metadata={"strategy": "sentence_aware", "final_chunk": True}
             )
-
-            if self.embedding_model:
-                embedding = self.embedding_model.encode(current_chunk.strip())
-                chunk_info.embedding = embedding.tolist()
-
             chunks.append(chunk_info)
 
         # Limit chunks to max_chunks
@@ -136,23 +319,151 @@ class RAGEngine:
             chunks = chunks[:self.config.max_chunks]
             logger.warning(f"Truncated to {self.config.max_chunks} chunks")
 
-        self.chunks.extend(chunks)
+        return chunks
 
-        # Add to vector store if available
-        if self.vector_store and chunks:
-            embeddings = np.array([chunk.embedding for chunk in chunks if chunk.embedding])
-            if len(embeddings) > 0:
-                self.vector_store.add(embeddings)
-                logger.info(f"Added {len(embeddings)} embeddings to vector store")
+    @staticmethod
+    def _chunk_digests(chunks: List[ChunkInfo]) -> List[bytes]:
+        """Content digests identifying the embedding of each chunk."""
+        return [hashlib.blake2b(chunk.content.encode(), digest_size=16).digest() for chunk in chunks]
+
+    def _embed_chunks(self, chunks: List[ChunkInfo], digests: List[bytes]) -> np.ndarray:
+        """Embeddings of chunks, one row each, without storing them in the engine."""
+        # A document embedded by an earlier run is read back from disk
+        # instead of going through the model again
+        cache_path = self._embedding_cache_path(digests)
+        embeddings = self._load_cached_embeddings(cache_path, len(chunks))
+        if embeddings is None:
+            embeddings = self._encode_chunks(chunks, digests)
+            self._store_cached_embeddings(cache_path, embeddings)
+        return embeddings
+
+    def _encode_chunks(self, chunks: List[ChunkInfo], digests: List[bytes]) -> np.ndarray:
+        """Embed chunks, encoding each distinct unseen content only once."""
+        # Boilerplate repeated across pages and documents (headers, footers,
+        # disclaimers) is only encoded once; repeats reuse the matrix row
+        # of the first chunk with the same content
+        rows = self._embedding_rows
+        pending: Dict[bytes, str] = {}
+        for digest, chunk in zip(digests, chunks):
+            if digest not in rows and digest not in pending:
+                pending[digest] = chunk.content
+
+        # Encode in one batched call rather than one model pass per chunk.
+        # Passing the whole list lets SentenceTransformer.encode sort it by
+        # length before batching (and restore the order after), so batches
+        # pad to similar lengths without a second sort here.
+        encoded: Dict[bytes, np.ndarray] = {}
+        if pending:
+            encoded = dict(zip(pending, self.embedding_model.encode(
+                list(pending.values()),
+                batch_size=self.config.embedding_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )))
+        return np.array(
+            [encoded[digest] if digest in encoded else self._embedding_matrix[rows[digest]] for digest in digests],
+            dtype=np.float32,
+        )
 
-        return chunks
+    def _embedding_cache_path(self, digests: List[bytes]) -> Optional[Path]:
+        """Path of the persisted embeddings for a chunk sequence, if caching is enabled."""
+        if not self.config.embedding_cache_dir:
+            return None
+        key = hashlib.blake2b(self.config.embedding_model.encode(), digest_size=16)
+        for digest in digests:
+            key.update(digest)
+        return Path(self.config.embedding_cache_dir).expanduser() / f"{key.hexdigest()}.npy"
+
+    @staticmethod
+    def _load_cached_embeddings(path: Optional[Path], count: int) -> Optional[np.ndarray]:
+        """Load persisted embeddings, or None when missing or unusable."""
+        if path is None or not path.exists():
+            return None
+        try:
+            embeddings = np.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache {path}: {e}")
+            return None
+        if embeddings.ndim != 2 or len(embeddings) != count:
+            return None
+        return embeddings.astype(np.float32, copy=False)
+
+    @staticmethod
+    def _store_cached_embeddings(path: Optional[Path], embeddings: np.ndarray) -> None:
+        """Persist embeddings atomically so readers never see a partial file."""
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+                np.save(f, embeddings)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist embeddings to {path}: {e}")
+
+    def _append_embeddings(self, embeddings: np.ndarray) -> None:
+        """Append rows to the embedding matrix, growing its buffer geometrically."""
+        count = 0 if self._embedding_matrix is None else len(self._embedding_matrix)
+        needed = count + len(embeddings)
+        buffer = self._embedding_buffer
+        if buffer is None or needed > len(buffer):
+            capacity = max(needed, 2 * (0 if buffer is None else len(buffer)))
+            grown = np.empty((capacity, embeddings.shape[1]), dtype=np.float32)
+            if buffer is not None:
+                grown[:count] = buffer[:count]
+            self._embedding_buffer = buffer = grown
+        buffer[count:needed] = embeddings
+        self._embedding_matrix = buffer[:needed]
+
+    def _maybe_upgrade_index(self) -> None:
+        """Rebuild the flat FAISS index as the configured compressed index type."""
+        index_type = self.config.vector_index_type
+        if index_type == "flat" or self.vector_store is None:
+            return
+
+        import faiss
+
+        index = self.vector_store
+        if not isinstance(index, faiss.IndexFlat) or index.ntotal == 0:
+            return
+        if index_type == "ivfpq" and index.ntotal <= _IVFPQ_MIN_VECTORS:
+            return
+
+        dim = index.d
+        vectors = index.reconstruct_n(0, index.ntotal)
+
+        if index_type == "sq8":
+            # One byte per dimension instead of a float32. Training records each
+            # dimension's value range and later vectors are clamped into it, so
+            # train on the full [-1, 1] range of a unit-length embedding rather
+            # than on a first batch that may be a single short document
+            upgraded = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            upgraded.train(np.stack([-np.ones(dim), np.ones(dim)]).astype(np.float32))
+            upgraded.add(vectors)
+            description = "8-bit scalar quantized"
+        else:
+            # A flat index compares the query with every stored vector; IVF-PQ
+            # only scans the closest inverted lists and stores compact PQ codes
+            nlist = int(4 * math.sqrt(index.ntotal))
+            # PQ splits each vector into sub-vectors, so their count must divide dim
+            subquantizers = next(m for m in (48, 32, 24, 16, 12, 8, 4, 2, 1) if dim % m == 0)
+
+            quantizer = faiss.IndexFlatIP(dim)
+            upgraded = faiss.IndexIVFPQ(quantizer, dim, nlist, subquantizers, 8, faiss.METRIC_INNER_PRODUCT)
+            upgraded.train(vectors)
+            upgraded.add(vectors)
+            upgraded.nprobe = _IVFPQ_NPROBE
+            description = f"IVF-PQ ({nlist} lists)"
+
+        self.vector_store = upgraded
+        logger.info(f"Rebuilt vector store as {description} for {index.ntotal} embeddings")
 
     def _split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences using simple heuristics."""
-        import re
         # Simple sentence splitting - could be enhanced with nltk or spacy
-        sentences = re.split(r'[.!?]+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        sentences = map(str.strip, _SENTENCE_SPLIT_RE.split(text))
+        return [s for s in sentences if s]
 
     def _get_overlap_text(self, text: str, overlap_size: int) -> str:
         """Get overlap text from the end of current chunk."""
@@ -168,51 +479,119 @@ class RAGEngine:
             return self._keyword_search(query, top_k)
 
         # Generate query embedding
-        query_embedding = self.embedding_model.encode(query)
+        query_embedding = self._encode_query(query)
+
+        cached = self._cached_results(query_embedding, top_k)
+        if cached is not None:
+            return cached
 
+        results = self._search_embeddings(query_embedding, top_k)
+        self._cache_results(query_embedding, top_k, results)
+        return results
+
+    def _search_embeddings(self, query_embedding: np.ndarray, top_k: int) -> List[ChunkInfo]:
+        """Find the top_k embedded chunks closest to a query embedding."""
+        embedded = self._embedded_chunks
         if self.vector_store:
             # Use FAISS for fast similarity search
-            scores, indices = self.vector_store.search(query_embedding.reshape(1, -1), top_k)
+            k = min(top_k, self.vector_store.ntotal)
+            if k <= 0:
+                return []
+            scores, indices = self.vector_store.search(query_embedding.reshape(1, -1), k)
+            # FAISS pads with -1 when an approximate index finds fewer than k
+            found = indices[0] >= 0
             results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx < len(self.chunks):
-                    chunk = self.chunks[idx]
-                    chunk.semantic_score = float(score)
-                    results.append(chunk)
+            for score, idx in zip(scores[0][found].tolist(), indices[0][found].tolist()):
+                chunk = embedded[idx]
+                chunk.semantic_score = score
+                results.append(chunk)
             return results
         else:
-            # Use cosine similarity for memory-based search
-            similarities = []
-            for chunk in self.chunks:
-                if chunk.embedding:
-                    similarity = np.dot(query_embedding, chunk.embedding) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(chunk.embedding)
-                    )
-                    similarities.append((similarity, chunk))
-
-            # Sort by similarity and return top_k
-            similarities.sort(key=lambda x: x[0], reverse=True)
+            # Use cosine similarity for memory-based search: chunk and query
+            # embeddings are unit length, so one matrix-vector product of dot
+            # products scores every chunk
+            if self._embedding_matrix is None:
+                return []
+
+            scores = self._embedding_matrix @ np.asarray(query_embedding, dtype=np.float32)
+
+            # Select the top_k in linear time, then order only those
+            k = min(top_k, len(scores))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.lexsort((top, -scores[top]))]
+
             results = []
-            for score, chunk in similarities[:top_k]:
-                chunk.semantic_score = float(score)
+            for idx, score in zip(top.tolist(), scores[top].tolist()):
+                chunk = embedded[idx]
+                chunk.semantic_score = score
                 results.append(chunk)
             return results
 
+    def _cached_results(self, query_embedding: np.ndarray, top_k: int) -> Optional[List[ChunkInfo]]:
+        """Results of a cached search for a near-identical query, or None."""
+        cache = self._result_cache
+        if not cache:
+            return None
+        # Cached queries are unit length like the query, so one product gives
+        # every cosine similarity; filled slots are always 0..len(cache) - 1
+        similarities = self._result_vectors[:len(cache)] @ np.asarray(query_embedding, dtype=np.float32)
+        slot = int(np.argmax(similarities))
+        cached_top_k, hits = cache[slot]
+        if similarities[slot] < _RESULT_CACHE_MIN_SIMILARITY or cached_top_k < top_k:
+            return None
+
+        cache.move_to_end(slot)
+        results = []
+        # Other searches overwrite semantic_score, so restore the cached one
+        for chunk, score in hits[:top_k]:
+            chunk.semantic_score = score
+            results.append(chunk)
+        return results
+
+    def _cache_results(self, query_embedding: np.ndarray, top_k: int, results: List[ChunkInfo]) -> None:
+        """Remember search results, evicting the least recently used entry when full."""
+        cache = self._result_cache
+        if self._result_vectors is None or self._result_vectors.shape[1] != len(query_embedding):
+            self._result_vectors = np.empty((_RESULT_CACHE_SIZE, len(query_embedding)), dtype=np.float32)
+            cache.clear()
+        if len(cache) < _RESULT_CACHE_SIZE:
+            slot = len(cache)
+        else:
+            slot, _ = cache.popitem(last=False)
+        self._result_vectors[slot] = query_embedding
+        cache[slot] = (top_k, [(chunk, chunk.semantic_score) for chunk in results])
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a search query, reusing the embedding of a recent identical query."""
+        embedding = self._query_cache.get(query)
+        if embedding is not None:
+            self._query_cache.move_to_end(query)
+            return embedding
+
+        embedding = self.embedding_model.encode(query, normalize_embeddings=True)
+        self._query_cache[query] = embedding
+        if len(self._query_cache) > _QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return embedding
+
     def _keyword_search(self, query: str, top_k: int) -> List[ChunkInfo]:
         """Fallback keyword-based search."""
-        query_words = set(query.lower().split())
+        query_words = frozenset(query.lower().split())
+        chunk_tokens = self._chunk_tokens
+        chunk_tokens.extend(frozenset(chunk.content.lower().split()) for chunk in self.chunks[len(chunk_tokens):])
         scored_chunks = []
 
-        for chunk in self.chunks:
-            chunk_words = set(chunk.content.lower().split())
-            overlap = query_words.intersection(chunk_words)
+        for chunk, chunk_words in zip(self.chunks, chunk_tokens):
+            overlap = len(query_words & chunk_words)
             if overlap:
-                score = len(overlap) / len(query_words)
+                score = overlap / len(query_words)
                 chunk.semantic_score = score
                 scored_chunks.append((score, chunk))
 
-        scored_chunks.sort(key=lambda x: x[0], reverse=True)
-        return [chunk for score, chunk in scored_chunks[:top_k]]
+        # Same result as a full descending sort, without sorting every match
+        return [chunk for score, chunk in heapq.nlargest(top_k, scored_chunks, key=itemgetter(0))]
 
 
 class HybridOCREngine:
@@ -267,6 +646,10 @@ class HybridOCREngine:
             results["method"] = "failed"
             return "", results
 
+    async def extract_text_from_images(self, images: List[bytes]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Extract text from several images concurrently, in input order."""
+        return list(await asyncio.gather(*(self.extract_text_from_image(image_data) for image_data in images)))
+
     async def _ai_ocr_extract(self, image_data: bytes) -> Tuple[str, float]:
         """AI-powered OCR extraction (simulated)."""
         # In a real implementation, this would call an AI OCR API like GPT-4V or similar
@@ -276,28 +659,57 @@ class HybridOCREngine:
     async def _tesseract_extract(self, image_data: bytes) -> Tuple[str, float]:
         """Traditional Tesseract OCR extraction."""
         try:
-            import pytesseract
-            from PIL import Image
-            import io
-
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
-
-            # Extract text with confidence data
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-
-            # Calculate average confidence
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-
-            # Extract text
-            text = pytesseract.image_to_string(image)
-
-            return text.strip(), avg_confidence / 100.0
+            # Tesseract runs as a blocking subprocess; keep it off the event loop
+            # so OCR of several images can overlap
+            return await asyncio.to_thread(self._tesseract_extract_sync, image_data)
         except Exception as e:
             logger.error(f"Tesseract extraction failed: {e}")
             return "", 0.0
 
+    def _tesseract_extract_sync(self, image_data: bytes) -> Tuple[str, float]:
+        """Run Tesseract on image bytes in the calling thread."""
+        import pytesseract
+        from PIL import Image
+        import io
+
+        # Convert bytes to PIL Image. Tesseract accuracy plateaus around 300 dpi,
+        # so decode JPEGs straight to grayscale (draft), let the decoder
+        # downscale oversized scans (thumbnail) and hand Tesseract one channel
+        image = Image.open(io.BytesIO(image_data))
+        image.draft("L", image.size)
+        image.thumbnail((_OCR_MAX_IMAGE_SIDE, _OCR_MAX_IMAGE_SIDE))
+        image = image.convert("L")
+
+        # Extract text with confidence data
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+
+        # Calculate average confidence
+        confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+
+        # Rebuild the text from the same recognition pass rather than running
+        # Tesseract a second time through image_to_string
+        text = self._text_from_tesseract_data(data)
+
+        return text.strip(), avg_confidence / 100.0
+
+    @staticmethod
+    def _text_from_tesseract_data(data: Dict[str, List[Any]]) -> str:
+        """Join image_to_data words into lines, with blank lines between paragraphs."""
+        lines: Dict[Tuple[int, int, int], List[str]] = {}
+        for block, par, line, word in zip(data['block_num'], data['par_num'], data['line_num'], data['text']):
+            if word.strip():
+                lines.setdefault((block, par, line), []).append(word)
+
+        text_lines = []
+        paragraph = None
+        for (block, par, _), words in lines.items():
+            if text_lines and (block, par) != paragraph:
+                text_lines.append("")
+            paragraph = (block, par)
+            text_lines.append(" ".join(words))
+        return "\n".join(text_lines)
+
 
 class MimicDocsrayProvider(DocumentProvider):
     """MIMIC.DocsRay provider with advanced document processing capabilities."""
@@ -307,6 +719,11 @@ class MimicDocsrayProvider(DocumentProvider):
         self._initialized = False
         self.rag_engine: Optional[RAGEngine] = None
         self.ocr_engine: Optional[HybridOCREngine] = None
+        # LRU of extracted text keyed by (path, mtime_ns, size, markdown)
+        self._text_cache: "OrderedDict[Tuple[str, int, int, bool], str]" = OrderedDict()
+        # Page start offsets of texts in _text_cache, under the same key and
+        # evicted with the text, so no document is kept alive twice
+        self._page_offsets_cache: Dict[Tuple[str, int, int, bool], List[int]] = {}
 
     def get_name(self) -> str:
         return "mimic-docsray"
@@ -519,7 +936,9 @@ class MimicDocsrayProvider(DocumentProvider):
             if "page" in target:
                 # Direct page navigation
                 page_num = target["page"]
-                content, location, context = await self._navigate_to_page(text_content, page_num)
+                content, location, context = await self._navigate_to_page(
+                    text_content, page_num, self._text_cache_key(doc_path)
+                )
 
             elif "section" in target:
                 # Semantic section search
@@ -628,7 +1047,7 @@ class MimicDocsrayProvider(DocumentProvider):
 
         try:
             # Extract base content
-            text_content = await self._extract_text_content(doc_path)
+            text_content = await self._extract_text_content(doc_path, markdown=output_format == "markdown")
 
             # Create structured output based on format
             if output_format == "markdown":
@@ -723,6 +1142,8 @@ class MimicDocsrayProvider(DocumentProvider):
         self._initialized = False
         self.rag_engine = None
         self.ocr_engine = None
+        self._text_cache.clear()
+        self._page_offsets_cache.clear()
         logger.info("MIMIC.DocsRay provider disposed")
 
     # Helper methods for document processing
@@ -737,31 +1158,75 @@ class MimicDocsrayProvider(DocumentProvider):
         if local_path:
             document.path = local_path
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                # Streamed, so large files are not read into memory at once,
+                # and hashed in a worker thread so the event loop keeps running
+                document.hash = await asyncio.to_thread(calculate_file_hash, local_path)
             return local_path
 
-        # It's a URL, download it
+        # It's a URL, download it, hashing the content as it is written
         if is_url(document.url):
-            local_path = await download_document(document.url)
+            hasher = None if document.hash else hashlib.sha256()
+            local_path = await download_document(document.url, hasher=hasher)
             document.path = local_path
-            if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+            if hasher is not None:
+                document.hash = hasher.hexdigest()
             return local_path
 
         raise ValueError(f"Unable to process document: {document.url}")
 
-    async def _extract_text_content(self, doc_path: Path) -> str:
+    async def _extract_text_content(self, doc_path: Path, markdown: bool = False) -> str:
+        """Extract text content from document, reusing the text of recent documents."""
+        # PDFs are only converted to Markdown when the caller needs its syntax;
+        # plain PyMuPDF text is many times faster to extract
+        markdown = markdown and doc_path.suffix.lower() == '.pdf'
+
+        # Every operation extracts its document, some several times (map and
+        # xray go through the structure and preview helpers too), so parse each
+        # file version once; a changed mtime or size invalidates the entry
+        key = self._text_cache_key(doc_path, markdown)
+        if key is None:
+            return await asyncio.to_thread(self._extract_text_sync, doc_path, markdown)
+
+        content = self._text_cache.get(key)
+        if content is not None:
+            self._text_cache.move_to_end(key)
+            return content
+
+        # Parsing a large PDF takes seconds; keep it off the event loop
+        content = await asyncio.to_thread(self._extract_text_sync, doc_path, markdown)
+        if content:
+            self._text_cache[key] = content
+            if len(self._text_cache) > _TEXT_CACHE_SIZE:
+                evicted, _ = self._text_cache.popitem(last=False)
+                self._page_offsets_cache.pop(evicted, None)
+        return content
+
+    @staticmethod
+    def _text_cache_key(doc_path: Path, markdown: bool = False) -> Optional[Tuple[str, int, int, bool]]:
+        """Key of the current version of a document in _text_cache, or None if it can't be stat'ed."""
+        markdown = markdown and doc_path.suffix.lower() == '.pdf'
+        try:
+            stat = doc_path.stat()
+        except OSError:
+            return None
+        return (str(doc_path), stat.st_mtime_ns, stat.st_size, markdown)
+
+    def _extract_text_sync(self, doc_path: Path, markdown: bool = False) -> str:
         """Extract text content from document using appropriate method."""
         # This is a simplified implementation - would use appropriate libraries
         # based on document format (PyMuPDF for PDF, python-docx for DOCX, etc.)
         try:
             if doc_path.suffix.lower() == '.pdf':
-                # Use PyMuPDF for PDF extraction
-                import pymupdf4llm
-                result = pymupdf4llm.to_markdown(str(doc_path))
-                return result
+                if markdown:
+                    # Use PyMuPDF4LLM for Markdown conversion
+                    import pymupdf4llm
+                    return pymupdf4llm.to_markdown(str(doc_path))
+                # Use PyMuPDF's text layer, skipping pages without text (such
+                # as scanned images, which are not OCRed here)
+                import fitz  # PyMuPDF
+                with fitz.open(str(doc_path)) as doc:
+                    pages = (page.get_text("text") for page in doc)
+                    return "\n".join(text for text in pages if text.strip())
             elif doc_path.suffix.lower() in ['.txt', '.md']:
                 # Simple text file
                 with open(doc_path, 'r', encoding='utf-8') as f:
@@ -777,19 +1242,27 @@ class MimicDocsrayProvider(DocumentProvider):
         """Estimate page count based on document type."""
         try:
             if doc_path.suffix.lower() == '.pdf':
-                import fitz  # PyMuPDF
-                with fitz.open(str(doc_path)) as doc:
-                    return len(doc)
+                return await asyncio.to_thread(self._count_pdf_pages, doc_path)
+            elif doc_path.suffix.lower() in ['.txt', '.md']:
+                # Estimate based on file size rather than reading the text;
+                # bytes approximate characters closely enough for ~3000 per page
+                return max(1, doc_path.stat().st_size // 3000)
             else:
-                # Estimate based on content length
-                content = await self._extract_text_content(doc_path)
-                return max(1, len(content) // 3000)  # ~3000 chars per page
+                # No text is extracted for other formats yet
+                return 1
         except:
             return 1
 
+    @staticmethod
+    def _count_pdf_pages(doc_path: Path) -> int:
+        """Count PDF pages with PyMuPDF, without rendering them."""
+        import fitz  # PyMuPDF
+        with fitz.open(str(doc_path)) as doc:
+            return len(doc)
+
     async def _analyze_structure(self, doc_path: Path) -> Dict[str, Any]:
         """Analyze document structure."""
-        content = await self._extract_text_content(doc_path)
+        content = await self._extract_text_content(doc_path, markdown=True)
 
         # Simple structure analysis
         lines = content.split('\n')
@@ -804,7 +1277,7 @@ class MimicDocsrayProvider(DocumentProvider):
 
     async def _generate_preview(self, doc_path: Path) -> Dict[str, Any]:
         """Generate document preview."""
-        content = await self._extract_text_content(doc_path)
+        content = await self._extract_text_content(doc_path, markdown=True)
 
         return {
             "firstContent": content[:500],
@@ -855,33 +1328,62 @@ class MimicDocsrayProvider(DocumentProvider):
             "word_count": len(words),
         }
 
-    async def _navigate_to_page(self, text_content: str, page_num: int) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    async def _navigate_to_page(
+        self, text_content: str, page_num: int, cache_key: Optional[Tuple[str, int, int, bool]] = None
+    ) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
         """Navigate to specific page."""
-        # Simplified page navigation
-        words = text_content.split()
-        words_per_page = 500
-        start_idx = (page_num - 1) * words_per_page
-        end_idx = start_idx + words_per_page
-
-        content = " ".join(words[start_idx:end_idx])
+        # Simplified page navigation: pages are runs of _WORDS_PER_PAGE words,
+        # so only the requested page is split and rejoined
+        offsets = self._page_offsets(text_content, cache_key)
+        content = ""
+        if 1 <= page_num <= len(offsets):
+            end = offsets[page_num] if page_num < len(offsets) else len(text_content)
+            content = " ".join(text_content[offsets[page_num - 1]:end].split())
         location = {"page": page_num, "type": "page"}
-        context = {"totalPages": len(words) // words_per_page + 1}
+        context = {"totalPages": max(1, len(offsets))}
 
         return content, location, context
 
+    def _page_offsets(self, text_content: str, cache_key: Optional[Tuple[str, int, int, bool]] = None) -> List[int]:
+        """Start offsets of the pages of a text, cached alongside the text in _text_cache."""
+        # Only cache offsets for the exact string _text_cache holds under the
+        # key, so a file that changed after it was read can't get stale ones
+        cacheable = cache_key is not None and self._text_cache.get(cache_key) is text_content
+        if cacheable:
+            offsets = self._page_offsets_cache.get(cache_key)
+            if offsets is not None:
+                return offsets
+
+        # Each match skips a whole page of words and the whitespace after it
+        offsets = []
+        pos = _LEADING_SPACE_RE.match(text_content).end()
+        while pos < len(text_content):
+            offsets.append(pos)
+            match = _PAGE_WORDS_RE.match(text_content, pos)
+            if match is None:
+                break
+            pos = match.end()
+
+        if cacheable:
+            self._page_offsets_cache[cache_key] = offsets
+        return offsets
+
     async def _find_section_semantic(self, text_content: str, section_name: str) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
         """Find section using semantic understanding."""
-        # Simplified semantic section finding
-        lines = text_content.split('\n')
-        for i, line in enumerate(lines):
-            if section_name.lower() in line.lower():
-                # Return surrounding context
-                start = max(0, i - 5)
-                end = min(len(lines), i + 20)
-                content = "\n".join(lines[start:end])
-                location = {"section": section_name, "line": i, "type": "section"}
-                context = {"found": True, "line_number": i}
-                return content, location, context
+        # Simplified semantic section finding: search the whole text once and
+        # work out the line from the match position (a name spanning lines
+        # never matched line by line, so it is not searched for)
+        pos = -1 if '\n' in section_name else _find_ignore_case(text_content, section_name)
+        if pos >= 0:
+            lines = text_content.split('\n')
+            i = text_content.count('\n', 0, pos)
+            # Return surrounding context
+            start = max(0, i - 5)
+            end = min(len(lines), i + 20)
+            content = "\n".join(lines[start:end])
+            location = {"section": section_name, "line": i, "type": "section"}
+            context = {"found": True, "line_number": i}
+            return content, location, context
 
         return "", {"section": section_name, "type": "section", "found": False}, {"found": False}
 
@@ -897,8 +1399,8 @@ class MimicDocsrayProvider(DocumentProvider):
                 return chunk.content, location, context
 
         # Fallback to keyword search
-        if query.lower() in text_content.lower():
-            pos = text_content.lower().find(query.lower())
+        pos = _find_ignore_case(text_content, query)
+        if pos >= 0:
             start = max(0, pos - 200)
             end = min(len(text_content), pos + 200)
             content = text_content[start:end]
@@ -920,26 +1422,14 @@ class MimicDocsrayProvider(DocumentProvider):
     async def _extract_entities_advanced(self, text_content: str, chunks: List[ChunkInfo]) -> List[Dict[str, Any]]:
         """Advanced entity extraction using semantic understanding."""
         # Simplified entity extraction - would use NLP libraries like spaCy
-        import re
-
         entities = []
+        for entity_type, pattern, confidence in _ENTITY_PATTERNS:
+            for match in pattern.finditer(text_content):
+                if len(entities) == 50:  # Limit to top 50
+                    return entities
+                entities.append({"text": match.group(), "type": entity_type, "confidence": confidence})
 
-        # Extract emails
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text_content)
-        for email in emails:
-            entities.append({"text": email, "type": "EMAIL", "confidence": 0.9})
-
-        # Extract dates (simple pattern)
-        dates = re.findall(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', text_content)
-        for date in dates:
-            entities.append({"text": date, "type": "DATE", "confidence": 0.8})
-
-        # Extract monetary amounts
-        money = re.findall(r'\$[\d,]+\.?\d*', text_content)
-        for amount in money:
-            entities.append({"text": amount, "type": "MONEY", "confidence": 0.85})
-
-        return entities[:50]  # Limit to top 50
+        return entities
 
     async def _extract_key_points_advanced(self, text_content: str, chunks: List[ChunkInfo]) -> List[str]:
         """Extract key points using semantic understanding."""
@@ -947,13 +1437,14 @@ class MimicDocsrayProvider(DocumentProvider):
         sentences = text_content.split('.')
         key_points = []
 
-        # Look for sentences with key indicators
+        # Look for sentences with key indicators, stopping at the first 10
         for sentence in sentences:
-            sentence = sentence.strip()
-            if any(indicator in sentence.lower() for indicator in ['important', 'key', 'critical', 'must', 'should']):
-                key_points.append(sentence)
+            if _KEY_POINT_RE.search(sentence.lower()):
+                key_points.append(sentence.strip())
+                if len(key_points) == 10:
+                    break
 
-        return key_points[:10]
+        return key_points
 
     async def _extract_relationships_advanced(self, text_content: str) -> List[Dict[str, Any]]:
         """Extract entity relationships."""
@@ -962,13 +1453,11 @@ class MimicDocsrayProvider(DocumentProvider):
 
     async def _analyze_sentiment_advanced(self, text_content: str) -> Dict[str, Any]:
         """Analyze document sentiment."""
-        # Simplified sentiment analysis
-        positive_words = ['good', 'great', 'excellent', 'positive', 'success']
-        negative_words = ['bad', 'poor', 'negative', 'failure', 'problem']
-
-        words = text_content.lower().split()
-        pos_count = sum(1 for word in words if word in positive_words)
-        neg_count = sum(1 for word in words if word in negative_words)
+        # Simplified sentiment analysis: count the words once, then look up
+        # only the indicator words that occur
+        word_counts = Counter(text_content.lower().split())
+        pos_count = sum(word_counts[word] for word in _POSITIVE_WORDS & word_counts.keys())
+        neg_count = sum(word_counts[word] for word in _NEGATIVE_WORDS & word_counts.keys())
 
         if pos_count > neg_count:
             sentiment = "positive"
@@ -1035,16 +1524,42 @@ class MimicDocsrayProvider(DocumentProvider):
         # Phase 1: Coarse search - find potential documents
         coarse_candidates = await self._coarse_document_search(query, search_path)
 
-        # Phase 2: Fine search - semantic analysis of candidates
-        for candidate in coarse_candidates:
-            fine_score = await self._fine_semantic_analysis(query, candidate)
-            if fine_score > 0.3:  # Threshold for relevance
-                results.append({
-                    "path": candidate["path"],
-                    "relevance_score": fine_score,
-                    "match_type": "semantic",
-                    "preview": candidate.get("preview", ""),
-                })
+        # Phase 2: Fine search - semantic analysis of candidates. Text
+        # extraction is independent per candidate, so it runs in worker
+        # threads for a sliding window of the next candidates, sized so parses
+        # don't oversubscribe the CPUs; each text is scored in candidate order
+        # as soon as it is ready, so at most a window of texts is held at once
+        async def extract(candidate: Dict[str, Any]) -> Optional[str]:
+            try:
+                return await self._extract_text_content(Path(candidate["path"]))
+            except Exception as e:
+                logger.error(f"Error in fine semantic analysis: {e}")
+                return None
+
+        upcoming = iter(coarse_candidates)
+        pending: Deque[asyncio.Task] = deque(
+            asyncio.create_task(extract(candidate)) for candidate in islice(upcoming, _FINE_ANALYSIS_CONCURRENCY)
+        )
+        try:
+            for candidate in coarse_candidates:
+                content = await pending.popleft()
+                following = next(upcoming, None)
+                if following is not None:
+                    pending.append(asyncio.create_task(extract(following)))
+                if content is None:
+                    continue
+
+                fine_score = await self._fine_semantic_analysis(query, candidate, content)
+                if fine_score > 0.3:  # Threshold for relevance
+                    results.append({
+                        "path": candidate["path"],
+                        "relevance_score": fine_score,
+                        "match_type": "semantic",
+                        "preview": candidate.get("preview", ""),
+                    })
+        finally:
+            for task in pending:
+                task.cancel()
 
         return results
 
@@ -1055,19 +1570,18 @@ class MimicDocsrayProvider(DocumentProvider):
 
         if search_path_obj.exists():
             # Search for documents containing the query
-            for file_path in search_path_obj.rglob("*"):
-                if file_path.is_file() and file_path.suffix.lower() in ['.pdf', '.txt', '.md', '.docx']:
-                    try:
-                        # Simple filename matching
-                        if query.lower() in file_path.name.lower():
-                            results.append({
-                                "path": str(file_path),
-                                "relevance_score": 0.8,
-                                "match_type": "filename",
-                                "preview": f"Filename match: {file_path.name}",
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error processing {file_path}: {e}")
+            for entry in _iter_files(str(search_path_obj), _BASIC_SEARCH_SUFFIXES):
+                try:
+                    # Simple filename matching
+                    if query.lower() in entry.name.lower():
+                        results.append({
+                            "path": entry.path,
+                            "relevance_score": 0.8,
+                            "match_type": "filename",
+                            "preview": f"Filename match: {entry.name}",
+                        })
+                except Exception as e:
+                    logger.warning(f"Error processing {entry.path}: {e}")
 
         return results
 
@@ -1077,37 +1591,34 @@ class MimicDocsrayProvider(DocumentProvider):
         search_path_obj = Path(search_path)
 
         if search_path_obj.exists():
-            for file_path in search_path_obj.rglob("*"):
-                if file_path.is_file() and file_path.suffix.lower() in self.get_supported_formats():
-                    # Quick filename and metadata check
-                    score = 0.0
-                    if query.lower() in file_path.name.lower():
-                        score += 0.5
-
-                    if score > 0.0 or True:  # For now, include all supported files
-                        candidates.append({
-                            "path": str(file_path),
-                            "initial_score": score,
-                            "preview": f"File: {file_path.name}",
-                        })
+            suffixes = tuple(f".{fmt}" for fmt in self.get_supported_formats())
+            for entry in _iter_files(str(search_path_obj), suffixes):
+                # Quick filename and metadata check
+                score = 0.0
+                if query.lower() in entry.name.lower():
+                    score += 0.5
+
+                if score > 0.0 or True:  # For now, include all supported files
+                    candidates.append({
+                        "path": entry.path,
+                        "initial_score": score,
+                        "preview": f"File: {entry.name}",
+                    })
 
         return candidates
 
-    async def _fine_semantic_analysis(self, query: str, candidate: Dict[str, Any]) -> float:
+    async def _fine_semantic_analysis(self, query: str, candidate: Dict[str, Any], content: str) -> float:
         """Fine-grained semantic analysis of candidate document."""
         try:
-            # Extract text content
             doc_path = Path(candidate["path"])
-            content = await self._extract_text_content(doc_path)
 
             # Perform semantic similarity (simplified)
             if self.rag_engine and self.rag_engine.embedding_model:
-                # Create temporary chunks for analysis
-                temp_chunks = await self.rag_engine.create_chunks(content, doc_path)
-                search_results = await self.rag_engine.semantic_search(query, top_k=1)
-
-                if search_results:
-                    return search_results[0].semantic_score or 0.0
+                # Score the candidate's own chunks without adding them to the
+                # engine, so repeated searches don't index the tree again
+                score = await self.rag_engine.score_text(query, content, doc_path)
+                if score is not None:
+                    return score
 
             # Fallback to keyword matching
             if query.lower() in content.lower():
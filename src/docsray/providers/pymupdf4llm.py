@@ -1,6 +1,6 @@
 """PyMuPDF4LLM provider implementation."""
 
-import hashlib
+import asyncio
 import logging
 import os
 import tempfile
@@ -10,7 +10,13 @@ from typing import Any, Dict, List, Optional
 import pymupdf4llm
 
 from ..config import PyMuPDFConfig
-from ..utils.documents import download_document, get_document_format, get_local_document, is_url
+from ..utils.documents import (
+    calculate_file_hash,
+    download_document,
+    get_document_format,
+    get_local_document,
+    is_url,
+)
 from .base import (
     Document,
     DocumentProvider,
@@ -494,8 +500,7 @@ class PyMuPDF4LLMProvider(DocumentProvider):
             document.path = local_path
             # Calculate hash if not present
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = await asyncio.to_thread(calculate_file_hash, local_path)
             return local_path
 
         # It's a URL, download it
@@ -505,8 +510,7 @@ class PyMuPDF4LLMProvider(DocumentProvider):
 
             # Calculate hash if not present
             if not document.hash:
-                with open(local_path, "rb") as f:
-                    document.hash = hashlib.sha256(f.read()).hexdigest()
+                document.hash = await asyncio.to_thread(calculate_file_hash, local_path)
 
             return local_path
         
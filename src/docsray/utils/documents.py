@@ -6,7 +6,7 @@ import mimetypes
 import os
 import tempfile
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from urllib.parse import urlparse
 
 import aiofiles
@@ -42,6 +42,16 @@ MIME_TO_FORMAT = {
     "text/plain": "txt",
 }
 
+# Read size used when streaming files through a hash
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Response headers that identify a version of a downloaded document, mapped to
+# the request headers used to revalidate it
+VALIDATOR_HEADERS = {
+    "etag": "If-None-Match",
+    "last-modified": "If-Modified-Since",
+}
+
 
 def get_document_format(url_or_path: str) -> Optional[str]:
     """Determine document format from URL or path.
@@ -66,12 +76,17 @@ def get_document_format(url_or_path: str) -> Optional[str]:
     return None
 
 
-async def download_document(url: str, timeout: int = 30) -> Path:
+async def download_document(url: str, timeout: int = 30, hasher: Optional[Any] = None,
+                            validators: Optional[Dict[str, str]] = None) -> Path:
     """Download document from URL to temporary file.
     
     Args:
         url: Document URL
         timeout: Download timeout in seconds
+        hasher: Optional ``hashlib`` hash object updated with each chunk as it
+            is written, so callers get the file digest without reading it back
+        validators: Optional dict filled with the response's ETag and
+            Last-Modified headers, for use with ``is_download_current``
         
     Returns:
         Path to downloaded file
@@ -99,10 +114,16 @@ async def download_document(url: str, timeout: int = 30) -> Path:
         async with httpx.AsyncClient(timeout=timeout) as client:
             async with client.stream("GET", url) as response:
                 response.raise_for_status()
+                if validators is not None:
+                    for header in VALIDATOR_HEADERS:
+                        if header in response.headers:
+                            validators[header] = response.headers[header]
 
                 # Write to file
                 async with aiofiles.open(temp_path, "wb") as f:
                     async for chunk in response.aiter_bytes(chunk_size=8192):
+                        if hasher is not None:
+                            hasher.update(chunk)
                         await f.write(chunk)
 
         logger.info(f"Downloaded document to: {temp_path}")
@@ -115,9 +136,45 @@ async def download_document(url: str, timeout: int = 30) -> Path:
         raise
 
 
+async def is_download_current(url: str, validators: Dict[str, str], timeout: int = 30) -> bool:
+    """Check whether a previous download of a URL is still current.
+    
+    Sends a conditional HEAD request built from the validators captured by
+    ``download_document``; a 304 response means the remote document is unchanged.
+    
+    Args:
+        url: Document URL
+        validators: ETag / Last-Modified headers from the earlier download
+        timeout: Request timeout in seconds
+        
+    Returns:
+        True if the server reports the document unchanged, False otherwise
+        (including when there are no validators or the request fails)
+    """
+    headers = {
+        VALIDATOR_HEADERS[name]: value for name, value in validators.items() if name in VALIDATOR_HEADERS
+    }
+    if not headers:
+        return False
+
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.head(url, headers=headers)
+    except httpx.HTTPError as e:
+        logger.debug(f"Revalidation request failed for {url}: {e}")
+        return False
+
+    return response.status_code == 304
+
+
 def calculate_file_hash(file_path: Path, algorithm: str = "sha256") -> str:
     """Calculate hash of a file.
     
+    The file is streamed, so memory use does not grow with file size. On
+    Python 3.11+ ``hashlib.file_digest`` hashes straight from the file
+    buffer in OpenSSL with the GIL released, which also lets OpenSSL use
+    SHA hardware extensions where the CPU has them.
+    
     Args:
         file_path: Path to file
         algorithm: Hash algorithm to use
@@ -125,10 +182,12 @@ def calculate_file_hash(file_path: Path, algorithm: str = "sha256") -> str:
     Returns:
         Hex digest of file hash
     """
-    hasher = hashlib.new(algorithm)
-
     with open(file_path, "rb") as f:
-        while chunk := f.read(8192):
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+
+        hasher = hashlib.new(algorithm)
+        while chunk := f.read(HASH_CHUNK_SIZE):
             hasher.update(chunk)
 
     return hasher.hexdigest()
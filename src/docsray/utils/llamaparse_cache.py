@@ -12,9 +12,33 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .documents import calculate_file_hash
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib json module is used otherwise
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _write_json(path: Path, data: Any) -> None:
+    """Write data as indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path) as f:
+        return json.load(f)
+
+
 class LlamaParseCache:
     """Manages caching of LlamaParse extraction results."""
     
@@ -28,17 +52,18 @@ class LlamaParseCache:
         self.cache_root.mkdir(parents=True, exist_ok=True)
         logger.info(f"LlamaParse cache initialized at: {self.cache_root}")
     
-    def get_cache_dir(self, document_path: Path) -> Path:
+    def get_cache_dir(self, document_path: Path, document_hash: Optional[str] = None) -> Path:
         """Get the cache directory for a document.
         
         Args:
             document_path: Path to the document
+            document_hash: Precomputed SHA256 of the document; computed if omitted
             
         Returns:
             Path to the cache directory (document_name.docsray)
         """
         # Use document name and hash for unique identification
-        doc_hash = self._compute_document_hash(document_path)
+        doc_hash = document_hash or self._compute_document_hash(document_path)
         cache_dir_name = f"{document_path.stem}.{doc_hash[:8]}.docsray"
         cache_dir = self.cache_root / cache_dir_name
         return cache_dir
@@ -53,25 +78,27 @@ class LlamaParseCache:
             SHA256 hash of document content
         """
         if document_path.exists():
-            with open(document_path, "rb") as f:
-                return hashlib.sha256(f.read()).hexdigest()
+            return calculate_file_hash(document_path)
         else:
             # For URLs or non-existent paths, hash the path itself
             return hashlib.sha256(str(document_path).encode()).hexdigest()
     
     async def store_extraction(self, document_path: Path, extraction_result: Dict[str, Any], 
-                              parsing_instruction: Optional[str] = None) -> Path:
+                              parsing_instruction: Optional[str] = None,
+                              document_hash: Optional[str] = None) -> Path:
         """Store LlamaParse extraction results in cache.
         
         Args:
             document_path: Path to the original document
             extraction_result: The full extraction result from LlamaParse
             parsing_instruction: The instruction used for parsing (for cache key)
+            document_hash: Precomputed SHA256 of the document; computed if omitted
             
         Returns:
             Path to the cache directory
         """
-        cache_dir = self.get_cache_dir(document_path)
+        document_hash = document_hash or self._compute_document_hash(document_path)
+        cache_dir = self.get_cache_dir(document_path, document_hash)
         cache_dir.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Storing LlamaParse extraction cache at: {cache_dir}")
@@ -79,19 +106,17 @@ class LlamaParseCache:
         # Store metadata
         metadata = {
             "original_document": str(document_path),
-            "document_hash": self._compute_document_hash(document_path),
+            "document_hash": document_hash,
             "extraction_timestamp": datetime.now().isoformat(),
             "parsing_instruction": parsing_instruction,
             "llamaparse_version": "latest",  # Could be enhanced to track actual version
             "cache_version": "1.0"
         }
         
-        with open(cache_dir / "metadata.json", "w") as f:
-            json.dump(metadata, f, indent=2)
+        _write_json(cache_dir / "metadata.json", metadata)
         
         # Store the full extraction result
-        with open(cache_dir / "extraction_result.json", "w") as f:
-            json.dump(extraction_result, f, indent=2)
+        _write_json(cache_dir / "extraction_result.json", extraction_result)
         
         # Store pages separately for easier access
         pages_dir = cache_dir / "pages"
@@ -110,21 +135,18 @@ class LlamaParseCache:
             
             # Store page metadata
             if page.get("metadata"):
-                with open(pages_dir / f"page_{page_num:03d}_metadata.json", "w") as f:
-                    json.dump(page["metadata"], f, indent=2)
+                _write_json(pages_dir / f"page_{page_num:03d}_metadata.json", page["metadata"])
             
             # Store layout if available
             if page.get("layout"):
-                with open(pages_dir / f"page_{page_num:03d}_layout.json", "w") as f:
-                    json.dump(page["layout"], f, indent=2)
+                _write_json(pages_dir / f"page_{page_num:03d}_layout.json", page["layout"])
         
         # Store images
         if extraction_result.get("images"):
             images_dir = cache_dir / "images"
             images_dir.mkdir(exist_ok=True)
             
-            with open(images_dir / "images_index.json", "w") as f:
-                json.dump(extraction_result["images"], f, indent=2)
+            _write_json(images_dir / "images_index.json", extraction_result["images"])
             
             # If image data is available, store separately
             for i, img in enumerate(extraction_result["images"]):
@@ -138,8 +160,7 @@ class LlamaParseCache:
             tables_dir = cache_dir / "tables"
             tables_dir.mkdir(exist_ok=True)
             
-            with open(tables_dir / "tables_index.json", "w") as f:
-                json.dump(extraction_result["tables"], f, indent=2)
+            _write_json(tables_dir / "tables_index.json", extraction_result["tables"])
             
             # Store individual tables
             for i, table in enumerate(extraction_result["tables"]):
@@ -148,8 +169,7 @@ class LlamaParseCache:
                         f.write(table["html"])
                 
                 if table.get("data"):
-                    with open(tables_dir / f"table_{i:03d}.json", "w") as f:
-                        json.dump(table["data"], f, indent=2)
+                    _write_json(tables_dir / f"table_{i:03d}.json", table["data"])
         
         # Copy original document to cache
         if document_path.exists():
@@ -157,8 +177,7 @@ class LlamaParseCache:
         
         # Store the raw documents list if available
         if extraction_result.get("documents"):
-            with open(cache_dir / "documents.json", "w") as f:
-                json.dump(extraction_result["documents"], f, indent=2)
+            _write_json(cache_dir / "documents.json", extraction_result["documents"])
         
         logger.info(f"Cache stored successfully with {len(extraction_result.get('pages', []))} pages, "
                    f"{len(extraction_result.get('images', []))} images, "
@@ -167,17 +186,20 @@ class LlamaParseCache:
         return cache_dir
     
     async def retrieve_extraction(self, document_path: Path, 
-                                 parsing_instruction: Optional[str] = None) -> Optional[Dict[str, Any]]:
+                                 parsing_instruction: Optional[str] = None,
+                                 document_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Retrieve cached LlamaParse extraction if available.
         
         Args:
             document_path: Path to the document
             parsing_instruction: The parsing instruction to match (optional)
+            document_hash: Precomputed SHA256 of the document; computed if omitted
             
         Returns:
             Cached extraction result or None if not found/invalid
         """
-        cache_dir = self.get_cache_dir(document_path)
+        current_hash = document_hash or self._compute_document_hash(document_path)
+        cache_dir = self.get_cache_dir(document_path, current_hash)
         
         if not cache_dir.exists():
             logger.debug(f"No cache found for {document_path}")
@@ -189,11 +211,9 @@ class LlamaParseCache:
             logger.warning(f"Cache directory exists but no metadata found: {cache_dir}")
             return None
         
-        with open(metadata_path) as f:
-            metadata = json.load(f)
+        metadata = _read_json(metadata_path)
         
         # Verify document hash matches (ensure document hasn't changed)
-        current_hash = self._compute_document_hash(document_path)
         if metadata.get("document_hash") != current_hash:
             logger.info(f"Document has changed, cache invalid for {document_path}")
             return None
@@ -209,8 +229,7 @@ class LlamaParseCache:
             logger.warning(f"No extraction result found in cache: {cache_dir}")
             return None
         
-        with open(extraction_path) as f:
-            extraction_result = json.load(f)
+        extraction_result = _read_json(extraction_path)
         
         logger.info(f"Retrieved cached extraction for {document_path} from {cache_dir}")
         logger.info(f"Cache contains {len(extraction_result.get('pages', []))} pages, "
@@ -219,9 +238,10 @@ class LlamaParseCache:
         
         return extraction_result
     
-    async def get_cached_extraction(self, document_path: Path, parsing_instruction: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    async def get_cached_extraction(self, document_path: Path, parsing_instruction: Optional[str] = None,
+                                    document_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Async wrapper for retrieve_extraction for compatibility."""
-        return await self.retrieve_extraction(document_path, parsing_instruction)
+        return await self.retrieve_extraction(document_path, parsing_instruction, document_hash)
     
     def clear_cache(self, document_path: Optional[Path] = None) -> int:
         """Clear cache for a specific document or all cached data.
@@ -261,8 +281,7 @@ class LlamaParseCache:
         for cache_dir in self.cache_root.glob("*.docsray"):
             metadata_path = cache_dir / "metadata.json"
             if metadata_path.exists():
-                with open(metadata_path) as f:
-                    metadata = json.load(f)
+                metadata = _read_json(metadata_path)
                 
                 # Calculate cache size
                 cache_size = sum(f.stat().st_size for f in cache_dir.rglob("*") if f.is_file())
@@ -295,8 +314,7 @@ class LlamaParseCache:
         if not metadata_path.exists():
             return None
         
-        with open(metadata_path) as f:
-            metadata = json.load(f)
+        metadata = _read_json(metadata_path)
         
         # Count cached items
         pages_count = len(list((cache_dir / "pages").glob("page_*.txt"))) if (cache_dir / "pages").exists() else 0
@@ -304,12 +322,10 @@ class LlamaParseCache:
         tables_count = 0
         
         if (cache_dir / "images" / "images_index.json").exists():
-            with open(cache_dir / "images" / "images_index.json") as f:
-                images_count = len(json.load(f))
+            images_count = len(_read_json(cache_dir / "images" / "images_index.json"))
         
         if (cache_dir / "tables" / "tables_index.json").exists():
-            with open(cache_dir / "tables" / "tables_index.json") as f:
-                tables_count = len(json.load(f))
+            tables_count = len(_read_json(cache_dir / "tables" / "tables_index.json"))
         
         # Calculate cache size
         cache_size = sum(f.stat().st_size for f in cache_dir.rglob("*") if f.is_file())
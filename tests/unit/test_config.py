@@ -87,6 +87,7 @@ class TestProviderConfigs:
         assert config.enabled is True
         assert config.api_key == "test-key"
         assert config.mode == "premium"
+        assert config.max_concurrency == 4
     
     def test_llama_parse_invalid_mode(self):
         with pytest.raises(ValueError):
@@ -147,7 +148,8 @@ class TestDocsrayConfig:
         "DOCSRAY_MISTRAL_API_KEY": "test-api-key",
         "DOCSRAY_LLAMAPARSE_ENABLED": "true",
         "DOCSRAY_LLAMAPARSE_API_KEY": "test-llama-key",
-        "DOCSRAY_LLAMAPARSE_MODE": "fast"
+        "DOCSRAY_LLAMAPARSE_MODE": "fast",
+        "DOCSRAY_LLAMAPARSE_MAX_CONCURRENCY": "2"
     })
     def test_from_env_api_providers(self):
         config = DocsrayConfig.from_env()
@@ -160,6 +162,7 @@ class TestDocsrayConfig:
         assert config.providers.llama_parse.enabled is True
         assert config.providers.llama_parse.api_key == "test-llama-key"
         assert config.providers.llama_parse.mode == "fast"
+        assert config.providers.llama_parse.max_concurrency == 2
     
     @patch.dict(os.environ, {
         "DOCSRAY_LLAMAPARSE_ENABLED": "true",
@@ -386,4 +386,21 @@ class TestIBMDoclingProvider:
         assert caps.features["structuredExtraction"] is True  # Should get +7 for extract
         assert caps.features["readingOrder"] is True  # Should get +5 for extract
         assert caps.features["documentClassification"] is True  # Should get +6 for map
-        assert caps.features["entityExtraction"] is True  # Should get +6 for xray
\ No newline at end of file
+        assert caps.features["entityExtraction"] is True  # Should get +6 for xray
+
+    @pytest.mark.asyncio
+    async def test_ensure_local_document_hashes_file(self, provider, tmp_path):
+        """Test that local documents are hashed with the streaming helper."""
+        import hashlib
+
+        from docsray.utils.documents import calculate_file_hash
+
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 body")
+        document = Document(url=str(doc_path))
+
+        with patch("docsray.providers.ibm_docling.calculate_file_hash", wraps=calculate_file_hash) as mock_hash:
+            assert await provider._ensure_local_document(document) == doc_path
+
+        mock_hash.assert_called_once_with(doc_path)
+        assert document.hash == hashlib.sha256(b"%PDF-1.4 body").hexdigest()
@@ -0,0 +1,732 @@
+"""Tests for LlamaParse provider result helpers."""
+
+import asyncio
+import hashlib
+import io
+import re
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from docsray.config import LlamaParseConfig
+from docsray.providers import llamaparse
+from docsray.providers.base import Document
+from docsray.providers.llamaparse import LlamaParseProvider, _without_cache
+from docsray.utils.llamaparse_cache import LlamaParseCache
+
+
+class TestLlamaParseSections:
+    """Test section extraction from parsed results."""
+
+    @pytest.fixture
+    def provider(self):
+        return LlamaParseProvider()
+
+    def test_extract_sections_from_page(self, provider):
+        page = {
+            "page_num": 1,
+            "markdown": "# Title\nIntro text\n## Details\nMore text\nEven more",
+        }
+
+        sections = provider._extract_sections_from_page(page)
+
+        assert [(s["level"], s["title"]) for s in sections] == [(1, "Title"), (2, "Details")]
+        assert sections[0]["content"] == "Intro text"
+        assert sections[1]["content"] == "More text\nEven more"
+
+    def test_extract_sections_from_page_slices_between_headings(self, provider):
+        page = {"page_num": 1, "markdown": "preamble\n# A\n# B\nb body\n\n## C"}
+
+        sections = provider._extract_sections_from_page(page)
+
+        assert [(s["title"], s["content"]) for s in sections] == [("A", ""), ("B", "b body"), ("C", "")]
+
+    def test_extract_sections_from_page_without_headings(self, provider):
+        page = {"page_num": 1, "text": "Just some text\nwithout headings"}
+
+        assert provider._extract_sections_from_page(page) == []
+
+    def test_extract_sections_walks_pages(self, provider):
+        result = {
+            "pages": [
+                {"page_num": 1, "markdown": "# One\ntext"},
+                {"page_num": 2, "markdown": "plain\n### Three"},
+            ]
+        }
+
+        sections = provider._extract_sections(result)
+
+        assert sections == [
+            {"level": 1, "title": "One", "page": 1},
+            {"level": 3, "title": "Three", "page": 2},
+        ]
+
+    def test_extract_sections_requires_heading_space(self, provider):
+        result = {"pages": [{"page_num": 1, "markdown": "#hashtag\n#\n##  Spaced Title  \r\n####### Seven"}]}
+
+        assert provider._extract_sections(result) == [
+            {"level": 2, "title": "Spaced Title", "page": 1}
+        ]
+
+    def test_extract_sections_memoized_on_result(self, provider):
+        result = {"pages": [{"page_num": 1, "markdown": "# One"}]}
+
+        first = provider._extract_sections(result)
+        result["pages"][0]["markdown"] = "# Changed"
+
+        assert provider._extract_sections(result) is first
+        assert provider._analyze_structure(result)["sections"] == 1
+        assert list(_without_cache(result)) == ["pages"]
+
+    def test_extract_sections_from_page_memoized_on_page(self, provider):
+        page = {"page_num": 1, "markdown": "# One\nbody"}
+        result = {"pages": [page]}
+
+        first = provider._extract_sections_from_page(page)
+
+        assert provider._extract_sections_from_page(page) is first
+        assert _without_cache(result)["pages"] == [{"page_num": 1, "markdown": "# One\nbody"}]
+
+    def test_analyze_structure(self, provider):
+        result = {"pages": [{"page_num": 1, "markdown": "# A\n### B\n## C"}]}
+
+        structure = provider._analyze_structure(result)
+
+        assert structure["sections"] == 3
+        assert structure["depth"] == 3
+        assert provider._analyze_structure({"pages": []})["depth"] == 0
+
+    def test_find_section(self, provider):
+        result = {
+            "pages": [
+                {"page_num": 1, "markdown": "# Overview\ntext"},
+                {"page_num": 2, "markdown": "## Payment Terms\nRent is due monthly"},
+            ]
+        }
+
+        assert provider._find_section(result, "payment") == "Content of section: Payment Terms"
+        assert provider._find_section(result, "appendix") is None
+
+    def test_find_section_uses_extracted_sections(self, provider):
+        result = {"pages": [{"page_num": 1, "markdown": "# Overview\n## Payment Terms"}]}
+        provider._extract_sections(result)
+        result["pages"] = []
+
+        assert provider._find_section(result, "PAYMENT") == "Content of section: Payment Terms"
+        assert provider._find_section(result, "appendix") is None
+        assert list(_without_cache(result)) == ["pages"]
+
+    def test_search_text_reports_page(self, provider):
+        result = {
+            "pages": [
+                {"page_num": 1, "text": "Nothing here"},
+                {"page_num": 2, "text": "The Lease Term is twelve months"},
+            ]
+        }
+
+        found = provider._search_text(result, "lease term")
+
+        assert found["location"] == {"page": 2, "position": 4, "type": "text"}
+        assert "Lease Term" in found["content"]
+        assert provider._search_text(result, "missing") is None
+
+    def test_search_text_escapes_query(self, provider):
+        result = {"pages": [{"page_num": 1, "text": "İstanbul costs $5.00 (approx.)"}]}
+
+        found = provider._search_text(result, "$5.00 (APPROX.)")
+
+        assert found["location"]["position"] == 15
+        assert provider._search_text(result, "5.0.") is None
+
+    def test_search_text_mixed_ascii_pages(self, provider):
+        result = {
+            "pages": [
+                {"page_num": 1, "text": "Plain ASCII page"},
+                {"page_num": 2, "text": "Le CAFÉ ouvert, then ASCII Terms"},
+            ]
+        }
+
+        assert provider._search_text(result, "café")["location"] == {"page": 2, "position": 3, "type": "text"}
+        assert provider._search_text(result, "ascii terms")["location"]["position"] == 21
+        assert provider._search_text(result, "ASCII")["location"]["page"] == 1
+
+
+class TestLlamaParseFormatting:
+    """Test hierarchy and output formatting of parsed results."""
+
+    @pytest.fixture
+    def provider(self):
+        return LlamaParseProvider()
+
+    @pytest.fixture
+    def parsed_result(self):
+        return {
+            "documents": [{"text": "# Intro\nHello world", "metadata": {}}],
+            "pages": [
+                {"page_num": 1, "text": "Hello world", "markdown": "# Intro\nHello world"},
+                {"page_num": 2, "text": "Second page", "markdown": "## Part\nSecond page"},
+            ],
+            "tables": [
+                {"page": 2, "html": "<table></table>", "data": None, "metadata": {}},
+                {"page": 2, "html": None, "data": [[1, 2]], "metadata": {}},
+            ],
+            "images": [{"page": 1, "type": "png", "data": None, "metadata": {"caption": "Logo"}}],
+            "metadata": {"title": "Sample"},
+        }
+
+    def test_build_hierarchy_enhanced_groups_resources_by_page(self, provider, parsed_result):
+        hierarchy = provider._build_hierarchy_enhanced(parsed_result, include_content=True)
+
+        page1, page2 = hierarchy["root"]["children"]
+        assert [c["type"] for c in page1["children"]] == ["section", "image"]
+        assert [c["type"] for c in page2["children"]] == ["section", "table", "table"]
+        assert page2["children"][1]["htmlContent"] == "<table></table>"
+
+    def test_format_as_markdown_enhanced(self, provider, parsed_result):
+        markdown = provider._format_as_markdown_enhanced(
+            parsed_result, ["text", "tables", "images", "metadata"]
+        )
+
+        assert "- **title**: Sample" in markdown
+        assert "## Page 1" in markdown and "## Page 2" in markdown
+        assert markdown.count("### Table") == 2
+        assert "- Image 1 (png)" in markdown
+        assert "  - caption: Logo" in markdown
+        assert markdown.index("- Image 1") < markdown.index("## Page 2")
+
+    def test_page_buckets_shared_across_formatters(self, provider, parsed_result):
+        hierarchy = provider._build_hierarchy_enhanced(parsed_result, include_content=False)
+        tables_by_page = parsed_result["_cache_tables_by_page"]
+
+        provider._format_as_markdown_enhanced(parsed_result, ["text", "tables"])
+
+        assert parsed_result["_cache_tables_by_page"] is tables_by_page
+        assert [t["page"] for t in tables_by_page[2]] == [2, 2]
+        assert "_cache_tables_by_page" not in _without_cache(parsed_result)
+        assert hierarchy["root"]["children"]
+
+    def test_format_as_json_legacy_resources_memoized(self, provider):
+        result = {
+            "documents": [{"text": "Body"}],
+            "tables": [{"page": 2}],
+            "images": [{"page": 1}, {"page": 3}],
+        }
+
+        output = provider._format_as_json(result, ["tables", "images"])
+
+        assert output["tables"] == [{"id": "table-1", "page": 2, "description": "Detected table"}]
+        assert [img["id"] for img in output["images"]] == ["img-1", "img-2"]
+        assert provider._extract_resources(result) is result["_cache_resources"]
+        assert "_cache_resources" not in _without_cache(result)
+
+    def test_format_as_markdown_enhanced_exact_layout(self, provider):
+        result = {
+            "pages": [{"page_num": 1, "markdown": "Body"}, {"page_num": 2, "markdown": ""}],
+            "tables": [{"page": 1, "html": "<table/>"}, {"page": 2}],
+            "images": [{"page": 1, "type": "png", "metadata": {"w": 1}}],
+            "metadata": {"title": "T"},
+        }
+
+        markdown = provider._format_as_markdown_enhanced(result, ["text", "tables", "images", "metadata"])
+
+        assert markdown == (
+            "# Document Metadata\n\n- **title**: T\n\n\n"
+            "## Page 1\n\nBody\n\n### Table\n\n```html\n<table/>\n```\n\n"
+            "\n### Images\n\n- Image 1 (png)\n  - w: 1\n\n---\n\n"
+            "## Page 2\n\n\n### Table\n\n\n---\n"
+        )
+
+    def test_format_as_markdown_enhanced_large_document(self, provider):
+        pages = [{"page_num": i, "markdown": f"Body {i}"} for i in range(1, 21)]
+
+        markdown = provider._format_as_markdown_enhanced({"pages": pages}, ["text"])
+
+        expected = "\n".join(f"## Page {i}\n\nBody {i}\n\n---\n" for i in range(1, 21))
+        assert markdown == expected
+
+    def test_stream_markdown_enhanced_matches_formatted_output(self, provider, parsed_result):
+        targets = ["text", "tables", "images", "metadata"]
+        fp = io.StringIO()
+
+        provider.stream_markdown_enhanced(parsed_result, targets, fp)
+
+        assert fp.getvalue() == provider._format_as_markdown_enhanced(parsed_result, targets)
+
+    def test_stream_markdown_enhanced_empty_result(self, provider):
+        fp = io.StringIO()
+
+        provider.stream_markdown_enhanced({"pages": []}, ["text"], fp)
+
+        assert fp.getvalue() == ""
+
+
+class TestLlamaParseAnalysis:
+    """Test entity and key point extraction."""
+
+    @pytest.fixture
+    def provider(self):
+        return LlamaParseProvider()
+
+    def test_extract_entities_pattern_fallback(self, provider):
+        result = {
+            "pages": [
+                {"page_num": 1, "text": "The IRS and the Social Security Administration met NASA. This is It."}
+            ]
+        }
+
+        entities = provider._extract_entities(result)
+
+        assert [e["text"] for e in entities] == ["IRS", "Social Security Administration", "NASA"]
+        assert all(e["type"] == "UNKNOWN" for e in entities)
+
+    def test_extract_entities_pattern_fallback_dedupes_in_order(self, provider):
+        result = {"pages": [{"page_num": 1, "text": "NASA met Boeing. Boeing met NASA, then Airbus."}]}
+
+        assert [e["text"] for e in provider._extract_entities(result)] == ["NASA", "Boeing", "Airbus"]
+
+    def test_extract_entities_skips_short_acronyms(self, provider):
+        result = {"pages": [{"page_num": 1, "text": "The US Army and UK NHS. It met EU officials."}]}
+
+        assert [e["text"] for e in provider._extract_entities(result)] == ["Army", "NHS"]
+
+    @pytest.mark.parametrize("text", [
+        "Zoë Smith met the ÉCOLE board and NASA.",
+        "Ann\x1cLee and Bob\vStone met NASA.",
+    ])
+    def test_extract_entities_same_with_ascii_engine(self, provider, monkeypatch, text):
+        expected = [e["text"] for e in provider._extract_entities({"pages": [{"page_num": 1, "text": text}]})]
+        # re2's \b is ASCII-only; re.ASCII gives the stdlib engine the same semantics
+        monkeypatch.setattr(llamaparse, "_ENTITY_ASCII_RE", re.compile(llamaparse._ENTITY_ASCII_PATTERN, re.ASCII))
+
+        result = {"pages": [{"page_num": 1, "text": text}]}
+
+        assert [e["text"] for e in provider._extract_entities(result)] == expected
+
+    def test_extract_entities_from_listing(self, provider):
+        text = "Entities:\n - Internal Revenue Service \r\n-- Bank Secrecy Act\n-\n- Internal Revenue Service\nnot-a-listing"
+        result = {"documents": [{"text": text}]}
+
+        assert provider._extract_entities(result) == [
+            {"text": "Internal Revenue Service", "type": "ORGANIZATION", "confidence": 0.8},
+            {"text": "Bank Secrecy Act", "type": "LEGISLATION", "confidence": 0.8},
+        ]
+
+    def test_join_text_memoized_on_result(self, provider):
+        result = {"documents": [{"text": "One"}, {"text": "Two"}]}
+
+        text = provider._join_text(result)
+        result["documents"].append({"text": "Three"})
+
+        assert provider._join_text(result) is text == "One Two"
+        assert list(_without_cache(result)) == ["documents"]
+
+    def test_extract_entities_capped(self, provider):
+        text = ", ".join(f"X{chr(65 + i % 26)}{chr(65 + i // 26)}" for i in range(200))
+        result = {"pages": [{"page_num": 1, "text": text}]}
+
+        assert len(provider._extract_entities(result)) == 50
+
+    def test_extract_key_points_dedupes_and_caps(self, provider):
+        bullets = "\n".join(f"- Key point number {i}" for i in range(20))
+        result = {
+            "documents": [{"text": "- Repeated point\n- Repeated point\n" + bullets}],
+            "pages": [{"page_num": 1, "text": "A page line that is long enough"}],
+        }
+
+        key_points = provider._extract_key_points(result)
+
+        assert len(key_points) == 10
+        assert key_points[0] == "Repeated point"
+        assert key_points.count("Repeated point") == 1
+        assert key_points[1] == "Key point number 0"
+
+    def test_extract_key_points_falls_back_to_sentences(self, provider):
+        result = {"documents": [{"text": "A. B..\nC. D\n.E. F"}]}
+
+        assert provider._extract_key_points(result) == ["A", "B", "C", "D", "E"]
+
+    def test_extract_key_points_strips_list_markers(self, provider):
+        result = {"documents": [{"text": "• Bullet item\n10. Tenth numbered item\n* Starred"}]}
+
+        assert provider._extract_key_points(result) == ["Bullet item", "Tenth numbered item", "Starred"]
+
+    def test_extract_key_points_from_pages_memoized(self, provider):
+        result = {"pages": [{"page_num": 1, "text": "   short   \n  A padded page line  \ntiny"}]}
+
+        key_points = provider._extract_key_points(result)
+        result["pages"] = []
+
+        assert key_points == ["A padded page line"]
+        assert provider._extract_key_points(result) is key_points
+        assert list(_without_cache(result)) == ["pages"]
+
+
+class TestLlamaParseIngest:
+    """Test normalization of LlamaParse API responses."""
+
+    @pytest.fixture
+    def provider(self, tmp_path):
+        provider = LlamaParseProvider()
+        provider.cache = LlamaParseCache(cache_root=tmp_path / "cache")
+        provider.parser = MagicMock()
+        provider._initialized = True
+        return provider
+
+    def test_capabilities_built_once(self, provider):
+        formats = provider.get_supported_formats()
+        formats.append("exe")
+
+        assert provider.get_capabilities() is LlamaParseProvider().get_capabilities()
+        assert "exe" not in provider.get_supported_formats()
+        assert provider.get_capabilities().formats == provider.get_supported_formats()
+
+    @pytest.mark.asyncio
+    async def test_can_process_rejects_before_initializing(self, provider):
+        provider._initialized = False
+        provider.config = LlamaParseConfig(api_key="test-key")
+        provider.initialize = AsyncMock()
+
+        too_big = Document(url="doc.pdf", format="pdf", size=200 * 1024 * 1024)
+        unsupported = Document(url="image.png", format="png")
+
+        assert await provider.can_process(too_big) is False
+        assert await provider.can_process(unsupported) is False
+        provider.initialize.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_can_process_supported_document(self, provider):
+        assert await provider.can_process(Document(url="report.DOCX", size=1024)) is True
+
+    @pytest.mark.asyncio
+    async def test_parse_document_normalizes_objects_and_dicts(self, provider, tmp_path):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+
+        object_page = SimpleNamespace(
+            page_num=1,
+            text="Page one",
+            markdown="# Page one",
+            images=[],
+            tables=[SimpleNamespace(html="<table></table>", data=None, metadata={})],
+        )
+        dict_page = {
+            "page_num": "2",
+            "text": "Page two",
+            "md": "# Page two",
+            "tables": [{"html": None, "data": [[1]]}],
+            "layout": {"columns": 2},
+        }
+        doc = SimpleNamespace(text="Full text", metadata={"title": "Doc"}, pages=[object_page, dict_page])
+        provider.parser.aload_data = AsyncMock(return_value=[doc])
+
+        result = await provider._parse_document(doc_path)
+
+        assert [p["page_num"] for p in result["pages"]] == [1, 2]
+        assert [p["markdown"] for p in result["pages"]] == ["# Page one", "# Page two"]
+        assert result["pages"][1]["layout"] == {"columns": 2}
+        assert result["tables"] == [
+            {"page": 1, "html": "<table></table>", "data": None, "metadata": {}},
+            {"page": 2, "html": None, "data": [[1]], "metadata": {}},
+        ]
+        assert result["metadata"] == {"title": "Doc"}
+
+        # Pages carry a normalized content field that is not persisted to the cache
+        assert [p["content"] for p in result["pages"]] == ["# Page one", "# Page two"]
+        cached = await provider.cache.retrieve_extraction(doc_path)
+        assert "content" not in cached["pages"][0]
+        assert not any(key.startswith("_cache_") for key in cached)
+
+    @pytest.mark.asyncio
+    async def test_extract_counts_page_characters(self, provider, tmp_path):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        pages = [
+            SimpleNamespace(page_num=1, text="abc", markdown="# abc", images=[], tables=[]),
+            {"page_num": 2, "text": "", "md": "# empty"},
+            {"page_num": 3, "text": "de"},
+        ]
+        doc = SimpleNamespace(text="abcde", metadata={}, pages=pages)
+        provider.parser.aload_data = AsyncMock(return_value=[doc])
+        provider._parser_for = lambda *args: provider.parser
+
+        result = await provider.extract(Document(url=str(doc_path)), {"output_format": "json"})
+
+        assert result.statistics["charactersExtracted"] == 5
+        assert result.statistics["pagesExtracted"] == 3
+
+    @pytest.mark.asyncio
+    async def test_parse_many_bounds_concurrent_api_calls(self, provider, tmp_path):
+        provider.config = LlamaParseConfig(max_concurrency=2)
+        doc_paths = []
+        for i in range(5):
+            doc_path = tmp_path / f"doc{i}.pdf"
+            doc_path.write_bytes(f"%PDF-1.4 doc {i}".encode())
+            doc_paths.append(doc_path)
+
+        active = peak = 0
+
+        async def fake_load(file_path):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return [SimpleNamespace(text=file_path, metadata={}, pages=[])]
+
+        provider.parser.aload_data = fake_load
+
+        results = await provider.parse_many(doc_paths)
+
+        assert peak == 2
+        assert [r["documents"][0]["text"] for r in results] == [str(p) for p in doc_paths]
+
+    @pytest.mark.asyncio
+    async def test_parse_document_retries_transient_failures(self, provider, tmp_path, monkeypatch):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr("docsray.providers.llamaparse.asyncio.sleep", fake_sleep)
+        provider.parser.aload_data = AsyncMock(side_effect=[
+            asyncio.TimeoutError(),
+            httpx.ConnectError("reset"),
+            [SimpleNamespace(text="ok", metadata={}, pages=[])],
+        ])
+
+        result = await provider._parse_document(doc_path)
+
+        assert result["documents"][0]["text"] == "ok"
+        assert delays == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_parse_document_gives_up_after_retries(self, provider, tmp_path, monkeypatch):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        monkeypatch.setattr("docsray.providers.llamaparse.asyncio.sleep", AsyncMock())
+        provider.parser.aload_data = AsyncMock(side_effect=asyncio.TimeoutError())
+
+        with pytest.raises(TimeoutError, match="timed out"):
+            await provider._parse_document(doc_path)
+        assert provider.parser.aload_data.await_count == 3
+
+        provider.parser.aload_data = AsyncMock(side_effect=ValueError("bad request"))
+        with pytest.raises(ValueError):
+            await provider._parse_document(doc_path)
+        provider.parser.aload_data.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_parse_document_does_not_mutate_shared_parser(self, provider, tmp_path, monkeypatch):
+        provider.config = LlamaParseConfig(api_key="test-key")
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        built = []
+
+        def fake_parser(**kwargs):
+            parser = SimpleNamespace(**kwargs)
+            parser.aload_data = AsyncMock(return_value=[SimpleNamespace(text="x", metadata={}, pages=[])])
+            built.append(parser)
+            return parser
+
+        monkeypatch.setitem(sys.modules, "llama_parse", SimpleNamespace(LlamaParse=fake_parser))
+        shared = provider.parser
+
+        await provider._parse_document(doc_path, parsing_instruction="Find dates", result_type="text")
+
+        assert len(built) == 1
+        assert built[0].parsing_instruction == "Find dates"
+        assert built[0].result_type == "text"
+        shared.aload_data.assert_not_called()
+        assert provider.parser is shared
+
+    @pytest.mark.asyncio
+    async def test_parse_document_reuses_document_hash(self, provider, tmp_path, monkeypatch):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        doc_hash = hashlib.sha256(doc_path.read_bytes()).hexdigest()
+        provider.parser.aload_data = AsyncMock(return_value=[SimpleNamespace(text="x", metadata={}, pages=[])])
+
+        def fail(path):
+            raise AssertionError("document should not be re-hashed")
+
+        monkeypatch.setattr(provider.cache, "_compute_document_hash", fail)
+
+        await provider._parse_document(doc_path, doc_hash=doc_hash)
+        cached = await provider._parse_document(doc_path, doc_hash=doc_hash)
+
+        assert cached["documents"][0]["text"] == "x"
+        provider.parser.aload_data.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_ensure_local_document_hashes_file(self, provider, tmp_path):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 " + b"x" * (3 * 1024 * 1024))
+        document = Document(url=str(doc_path))
+
+        local_path = await provider._ensure_local_document(document)
+
+        assert local_path == doc_path
+        assert document.hash == hashlib.sha256(doc_path.read_bytes()).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_ensure_local_document_hashes_download_while_streaming(self, provider, tmp_path, monkeypatch):
+        downloaded = tmp_path / "remote.pdf"
+        body = b"%PDF-1.4 remote"
+
+        async def fake_download(url, hasher=None, validators=None):
+            downloaded.write_bytes(body)
+            hasher.update(body)
+            return downloaded
+
+        def fail(path):
+            raise AssertionError("download should not be re-read for hashing")
+
+        monkeypatch.setattr("docsray.providers.llamaparse.download_document", fake_download)
+        monkeypatch.setattr("docsray.providers.llamaparse.calculate_file_hash", fail)
+        document = Document(url="https://example.com/remote.pdf")
+
+        assert await provider._ensure_local_document(document) == downloaded
+        assert document.hash == hashlib.sha256(body).hexdigest()
+        assert await provider._hash_file(downloaded) == document.hash
+
+    @pytest.mark.asyncio
+    async def test_ensure_local_document_reuses_unchanged_download(self, provider, tmp_path, monkeypatch):
+        downloaded = tmp_path / "remote.pdf"
+        downloads = []
+
+        async def fake_download(url, hasher=None, validators=None):
+            downloads.append(url)
+            downloaded.write_bytes(b"%PDF-1.4 remote")
+            hasher.update(b"%PDF-1.4 remote")
+            validators["etag"] = '"v1"'
+            return downloaded
+
+        current = AsyncMock(side_effect=[True, False])
+        monkeypatch.setattr("docsray.providers.llamaparse.download_document", fake_download)
+        monkeypatch.setattr("docsray.providers.llamaparse.is_download_current", current)
+        url = "https://example.com/remote.pdf"
+
+        first = Document(url=url)
+        await provider._ensure_local_document(first)
+        second = Document(url=url)
+        assert await provider._ensure_local_document(second) == downloaded
+        assert second.hash == first.hash
+        assert len(downloads) == 1
+        current.assert_awaited_with(url, {"etag": '"v1"'})
+
+        # A changed remote document is downloaded again
+        await provider._ensure_local_document(Document(url=url))
+        assert len(downloads) == 2
+
+    @pytest.mark.asyncio
+    async def test_hash_file_memoized_until_file_changes(self, provider, tmp_path, monkeypatch):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"first")
+        calls = []
+
+        def fake_hash(path):
+            calls.append(path)
+            return f"digest-{len(calls)}"
+
+        monkeypatch.setattr("docsray.providers.llamaparse.calculate_file_hash", fake_hash)
+
+        assert await provider._hash_file(doc_path) == "digest-1"
+        assert await provider._hash_file(doc_path) == "digest-1"
+
+        doc_path.write_bytes(b"second version")
+        assert await provider._hash_file(doc_path) == "digest-2"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_peek_preview_without_pages(self, provider, tmp_path):
+        provider.config = LlamaParseConfig(api_key="test-key")
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        provider._parse_document = AsyncMock(return_value={"documents": [{"text": "Body"}], "pages": []})
+
+        result = await provider.peek(Document(url=str(doc_path)), {"depth": "preview"})
+
+        assert result.preview["firstPageText"] == ""
+        assert result.preview["firstPageMarkdown"] == ""
+        assert result.preview["availableData"]["documents"] == 1
+
+    @pytest.mark.asyncio
+    async def test_peek_reports_detected_resources(self, provider, tmp_path):
+        provider.config = LlamaParseConfig(api_key="test-key")
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        provider._parse_document = AsyncMock(return_value={
+            "documents": [],
+            "pages": [{"page_num": 1, "text": "One", "layout": {"columns": 2}}],
+            "images": [],
+            "tables": [{"page": 1, "html": "<table></table>"}],
+            "metadata": {},
+        })
+
+        result = await provider.peek(Document(url=str(doc_path)), {"depth": "structure"})
+
+        features = result.metadata["providerCapabilities"]["features"]
+        assert "layout_preservation" in features and "table_extraction" in features
+        assert "image_extraction" not in features
+        assert result.structure["hasTables"] is True and result.structure["hasImages"] is False
+        assert result.structure["extractionTypes"] == ["documents", "pages", "images", "tables", "metadata"]
+
+    @pytest.mark.asyncio
+    async def test_map_page_structure(self, provider, tmp_path):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        provider._parse_document = AsyncMock(return_value={
+            "documents": [],
+            "pages": [
+                {"page_num": 1, "text": "One", "markdown": "# One"},
+                {"page_num": 2, "text": "", "markdown": ""},
+            ],
+            "images": [{"page": 2, "type": "png", "metadata": {}}],
+            "tables": [{"page": 1, "html": "<table></table>", "metadata": {}}],
+            "metadata": {},
+        })
+
+        result = await provider.map(Document(url=str(doc_path)), {})
+
+        assert result.document_map["pageStructure"] == [
+            {"pageNumber": 1, "hasText": True, "hasImages": False, "hasTables": True},
+            {"pageNumber": 2, "hasText": False, "hasImages": True, "hasTables": False},
+        ]
+        assert result.statistics["totalSections"] == 1
+        page1, page2 = result.document_map["hierarchy"]["root"]["children"]
+        assert [c["type"] for c in page1["children"]] == ["section", "table"]
+        assert [c["type"] for c in page2["children"]] == ["image"]
+
+    @pytest.mark.asyncio
+    async def test_offload_scan_uses_thread_for_large_documents(self, provider):
+        def scan(result):
+            return threading.current_thread() is threading.main_thread()
+
+        small = {"pages": [{"page_num": 1}]}
+        large = {"pages": [{"page_num": i} for i in range(1, 41)]}
+
+        assert await provider._offload_scan(small, scan, small) is True
+        assert await provider._offload_scan(large, scan, large) is False
+
+    @pytest.mark.asyncio
+    async def test_map_counts_document_sections_without_pages(self, provider, tmp_path):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        provider._parse_document = AsyncMock(return_value={
+            "documents": [{"text": "# One\n## Two"}],
+            "pages": [],
+            "images": [],
+            "tables": [],
+            "metadata": {},
+        })
+
+        result = await provider.map(Document(url=str(doc_path)), {})
+
+        assert result.document_map["pageStructure"] == []
+        assert result.statistics["totalSections"] == 2
@@ -0,0 +1,987 @@
+"""Tests for the MIMIC.DocsRay RAG engine."""
+
+import asyncio
+import hashlib
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from docsray.config import MimicDocsrayConfig
+from docsray.providers import mimic_docsray
+from docsray.providers.base import Document
+from docsray.providers.mimic_docsray import ChunkInfo, HybridOCREngine, MimicDocsrayProvider, RAGEngine
+
+
+class FakeEmbeddingModel:
+    """Deterministic stand-in for a SentenceTransformer model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, sentences, **kwargs):
+        self.calls.append((sentences, kwargs))
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        vectors = np.array(
+            [[len(text), text.count("a") + 1.0, text.count("e") + 1.0] for text in texts],
+            dtype=np.float32,
+        )
+        if kwargs.get("normalize_embeddings"):
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+class FakeIndex:
+    """Minimal in-memory index with the FAISS methods the engine uses."""
+
+    def __init__(self, d):
+        self.d = d
+        self.vectors = np.zeros((0, d), dtype=np.float32)
+
+    @property
+    def ntotal(self):
+        return len(self.vectors)
+
+    def add(self, vectors):
+        self.vectors = np.vstack([self.vectors, vectors])
+
+    def reconstruct_n(self, start, count):
+        return self.vectors[start:start + count]
+
+    def search(self, queries, k):
+        scores = queries @ self.vectors.T
+        order = np.argsort(-scores, axis=1)[:, :k]
+        return np.take_along_axis(scores, order, axis=1), order
+
+
+class FakeFlatIndex(FakeIndex):
+    pass
+
+
+class FakeIVFPQIndex(FakeIndex):
+    def __init__(self, quantizer, d, nlist, m, nbits, metric):
+        super().__init__(d)
+        self.params = (nlist, m, nbits, metric)
+        self.trained_on = None
+
+    def train(self, vectors):
+        self.trained_on = vectors
+
+
+class FakeScalarQuantizerIndex(FakeIndex):
+    def __init__(self, d, qtype, metric):
+        super().__init__(d)
+        self.params = (qtype, metric)
+        self.trained_on = None
+
+    def train(self, vectors):
+        self.trained_on = vectors
+
+
+@pytest.fixture
+def fake_faiss(monkeypatch):
+    module = SimpleNamespace(
+        IndexFlat=FakeFlatIndex,
+        IndexFlatIP=FakeFlatIndex,
+        IndexIVFPQ=FakeIVFPQIndex,
+        IndexScalarQuantizer=FakeScalarQuantizerIndex,
+        ScalarQuantizer=SimpleNamespace(QT_8bit=1),
+        METRIC_INNER_PRODUCT=0,
+    )
+    monkeypatch.setitem(sys.modules, "faiss", module)
+    return module
+
+
+class FakeImage:
+    """Stand-in for a PIL image decoded from raw bytes."""
+
+    def __init__(self, data, size=(1000, 1400), mode="RGB"):
+        self.data = data
+        self.size = size
+        self.mode = mode
+
+    def draft(self, mode, size):
+        self.mode = mode
+
+    def thumbnail(self, size):
+        scale = min(1.0, size[0] / self.size[0], size[1] / self.size[1])
+        self.size = (int(self.size[0] * scale), int(self.size[1] * scale))
+
+    def convert(self, mode):
+        return FakeImage(self.data, self.size, mode)
+
+
+class FakeTesseract:
+    """Records the images and threads pytesseract is called with."""
+
+    class Output:
+        DICT = "dict"
+
+    def __init__(self):
+        self.calls = []
+        self.images = []
+
+    def image_to_data(self, image, output_type=None):
+        self.images.append(image)
+        self.calls.append(("image_to_data", image.data, threading.get_ident()))
+        words = image.data.decode().split()
+        return {
+            "block_num": [0, *[1] * len(words)],
+            "par_num": [0, *[1] * len(words)],
+            "line_num": [0, *[1] * len(words)],
+            "text": ["", *words],
+            "conf": ["-1", *["90"] * len(words)],
+        }
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    tesseract = FakeTesseract()
+    image_module = SimpleNamespace(open=lambda fp: FakeImage(fp.read()))
+    monkeypatch.setitem(sys.modules, "pytesseract", tesseract)
+    monkeypatch.setitem(sys.modules, "PIL", SimpleNamespace(Image=image_module))
+    monkeypatch.setitem(sys.modules, "PIL.Image", image_module)
+    return tesseract
+
+
+@pytest.fixture
+def fake_pymupdf4llm(monkeypatch):
+    calls = []
+
+    def to_markdown(path):
+        calls.append(path)
+        return f"# Parsed {Path(path).read_bytes().decode()}"
+
+    monkeypatch.setitem(sys.modules, "pymupdf4llm", SimpleNamespace(to_markdown=to_markdown))
+    return calls
+
+
+@pytest.fixture
+def config():
+    return MimicDocsrayConfig(chunk_size=100, chunk_overlap=2, max_chunks=10, vector_store_type="memory")
+
+
+@pytest.fixture
+def engine(config):
+    engine = RAGEngine(config)
+    engine.embedding_model = FakeEmbeddingModel()
+    engine._initialized = True
+    return engine
+
+
+def sample_text(sentences=12):
+    return " ".join(f"Sentence number {i} talks about apples and pears." for i in range(sentences))
+
+
+class TestRAGEngineChunking:
+    """Test chunk creation and embedding."""
+
+    async def test_create_chunks_encodes_in_one_batch(self, engine):
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        assert len(chunks) > 1
+        assert len(engine.embedding_model.calls) == 1
+        texts, kwargs = engine.embedding_model.calls[0]
+        assert texts == [chunk.content for chunk in chunks]
+        assert kwargs["batch_size"] == 32
+        assert kwargs["normalize_embeddings"] is True
+        assert all(isinstance(chunk.embedding, np.ndarray) for chunk in chunks)
+        assert all(np.linalg.norm(chunk.embedding) == pytest.approx(1.0) for chunk in chunks)
+        assert engine.chunks == chunks
+
+    async def test_create_chunks_encodes_repeated_content_once(self, engine):
+        boilerplate = "Confidential draft, do not distribute. " * 3
+        first = await engine.create_chunks(boilerplate + "Apples are red.", Path("first.txt"))
+        second = await engine.create_chunks(boilerplate + "Pears are green.", Path("second.txt"))
+
+        encoded = [text for texts, _ in engine.embedding_model.calls for text in texts]
+        assert len(encoded) == len(set(encoded))
+        assert first[0].content == second[0].content
+        np.testing.assert_array_equal(first[0].embedding, second[0].embedding)
+        assert engine._embedding_matrix.shape == (len(first) + len(second), 3)
+
+    async def test_create_chunks_reuses_persisted_embeddings(self, config, tmp_path):
+        config.embedding_cache_dir = str(tmp_path / "embeddings")
+        engines = []
+        for _ in range(2):
+            engine = RAGEngine(config)
+            engine.embedding_model = FakeEmbeddingModel()
+            engine._initialized = True
+            await engine.create_chunks(sample_text(), Path("doc.txt"))
+            engines.append(engine)
+
+        first, second = engines
+        assert len(first.embedding_model.calls) == 1
+        assert second.embedding_model.calls == []
+        assert len(list((tmp_path / "embeddings").glob("*.npy"))) == 1
+        np.testing.assert_array_equal(second._embedding_matrix, first._embedding_matrix)
+
+    async def test_create_chunks_ignores_unreadable_persisted_embeddings(self, engine, config, tmp_path):
+        config.embedding_cache_dir = str(tmp_path)
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+        next(tmp_path.glob("*.npy")).write_bytes(b"not an array")
+        engine = RAGEngine(config)
+        engine.embedding_model = FakeEmbeddingModel()
+        engine._initialized = True
+
+        again = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        assert len(engine.embedding_model.calls) == 1
+        np.testing.assert_array_equal([c.embedding for c in again], [c.embedding for c in chunks])
+
+    async def test_create_chunks_embeds_only_kept_chunks(self, engine, config):
+        config.max_chunks = 10
+        chunks = await engine.create_chunks(sample_text(60), Path("doc.txt"))
+
+        assert len(chunks) == 10
+        assert len(engine.embedding_model.calls[0][0]) == 10
+
+    async def test_create_chunks_carries_overlap_between_chunks(self, engine):
+        a, b, c = "a" * 60, "b" * 30, "c" * 30
+        text = f"{a}. {b} {b}. {c} {c}."
+
+        chunks = await engine.create_chunks(text, Path("doc.txt"))
+
+        assert [chunk.content for chunk in chunks] == [a, f"{a} {b} {b}", f"{b} {b} {c} {c}"]
+        assert [(chunk.start_pos, chunk.end_pos) for chunk in chunks] == [(0, 61), (62, 185), (124, 247)]
+        assert [chunk.metadata.get("sentence_count") for chunk in chunks] == [1, 2, None]
+        assert chunks[-1].metadata["final_chunk"] is True
+
+    async def test_create_chunks_skips_embedding_after_failed_initialize(self, engine):
+        engine._initialized = False
+
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        assert engine.embedding_model.calls == []
+        assert all(chunk.embedding is None for chunk in chunks)
+        assert engine._embedding_matrix is None
+
+    def test_chunk_info_defaults_are_not_shared(self):
+        first = ChunkInfo(chunk_id="a", content="x")
+        second = ChunkInfo(chunk_id="b", content="y")
+
+        first.metadata["key"] = "value"
+
+        assert second.metadata == {}
+        assert first.embedding is None and first.semantic_score is None
+
+    def test_split_into_sentences(self, engine):
+        text = "  First one. Second!? Third...\n\nPi is 3.14 \t . !"
+
+        assert engine._split_into_sentences(text) == ["First one", "Second", "Third", "Pi is 3", "14"]
+
+    async def test_create_chunks_without_model(self, config):
+        engine = RAGEngine(config)
+
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        assert chunks and all(chunk.embedding is None for chunk in chunks)
+
+
+class TestRAGEngineSearch:
+    """Test semantic and keyword search over chunks."""
+
+    async def test_memory_search_ranks_by_cosine_similarity(self, engine):
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        results = await engine.semantic_search("banana", top_k=3)
+
+        raw = [(len(chunk.content), chunk.content.count("a") + 1.0, chunk.content.count("e") + 1.0) for chunk in chunks]
+        query = np.array([6, 4, 1], dtype=np.float32)
+
+        def cosine(vector):
+            return float(np.dot(query, vector) / (np.linalg.norm(query) * np.linalg.norm(vector)))
+
+        best = sorted((cosine(vector) for vector in raw), reverse=True)[:3]
+        assert [chunk.semantic_score for chunk in results] == pytest.approx(best)
+
+    async def test_memory_search_spans_documents(self, engine):
+        await engine.create_chunks(sample_text(), Path("first.txt"))
+        await engine.create_chunks("Eeeee eeee eee. " * 20, Path("second.txt"))
+
+        results = await engine.semantic_search("eeeeeeee", top_k=1)
+
+        assert engine._embedding_matrix.shape == (len(engine.chunks), 3)
+        assert results[0].chunk_id.startswith("second_chunk_")
+
+    def test_append_embeddings_grows_buffer_geometrically(self, engine):
+        rows = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+        engine._append_embeddings(rows[:3])
+        engine._append_embeddings(rows[3:])
+        buffer = engine._embedding_buffer
+        engine._append_embeddings(rows[:1])
+
+        assert len(buffer) == 6 and engine._embedding_buffer is buffer
+        np.testing.assert_array_equal(engine._embedding_matrix, np.vstack([rows, rows[:1]]))
+
+    async def test_semantic_search_reuses_query_embeddings(self, engine, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_QUERY_CACHE_SIZE", 2)
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+        calls = engine.embedding_model.calls
+
+        for query in ("apples", "pears", "apples", "plums", "apples", "pears"):
+            await engine.semantic_search(query, top_k=1)
+
+        assert [args for args, _ in calls[1:]] == ["apples", "pears", "plums", "pears"]
+        assert list(engine._query_cache) == ["apples", "pears"]
+
+    async def test_semantic_search_reuses_results_of_near_identical_queries(self, engine, monkeypatch):
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+        searched = []
+        search_embeddings = engine._search_embeddings
+        monkeypatch.setattr(engine, "_search_embeddings", lambda q, k: searched.append(k) or search_embeddings(q, k))
+
+        first = await engine.semantic_search("banana", top_k=3)
+        scores = [chunk.semantic_score for chunk in first]
+        await engine.semantic_search("eeeeeeee", top_k=1)
+        again = await engine.semantic_search("Banana", top_k=2)
+
+        assert searched == [3, 1]
+        assert again == first[:2]
+        assert [chunk.semantic_score for chunk in again] == scores[:2]
+
+        # A larger top_k than was cached, or new chunks, go back to the index
+        await engine.semantic_search("banana", top_k=4)
+        await engine.create_chunks("Bananas. " * 5, Path("more.txt"))
+        await engine.semantic_search("banana", top_k=1)
+        assert searched == [3, 1, 4, 1]
+
+    async def test_result_cache_evicts_least_recently_used(self, engine, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_RESULT_CACHE_SIZE", 2)
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        for query in ("banana", "eeeeeeee", "banana", "zzzzzz"):
+            await engine.semantic_search(query, top_k=1)
+
+        cached = engine._result_vectors[list(engine._result_cache)]
+        np.testing.assert_array_equal(cached, [engine._encode_query("banana"), engine._encode_query("zzzzzz")])
+
+    async def test_memory_search_without_chunks(self, engine):
+        assert await engine.semantic_search("anything") == []
+
+    async def test_memory_search_top_k_larger_than_corpus(self, engine):
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        results = await engine.semantic_search("pears", top_k=len(chunks) + 5)
+
+        scores = [chunk.semantic_score for chunk in results]
+        assert len(results) == len(chunks)
+        assert scores == sorted(scores, reverse=True)
+
+    async def test_search_skips_chunks_created_without_embeddings(self, engine):
+        engine._initialized = False
+        await engine.create_chunks("Eeeee eeee eee. " * 20, Path("early.txt"))
+        engine._initialized = True
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        results = await engine.semantic_search("eeeeeeee", top_k=100)
+
+        assert len(results) == len(chunks)
+        assert all(chunk.chunk_id.startswith("doc_chunk_") for chunk in results)
+
+    async def test_faiss_search_drops_padding_results(self, engine, fake_faiss, monkeypatch):
+        engine.vector_store = fake_faiss.IndexFlatIP(3)
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        def padded_search(queries, k):
+            scores = np.full((1, k), -np.inf, dtype=np.float32)
+            indices = np.full((1, k), -1)
+            scores[0, 0], indices[0, 0] = 0.5, 1
+            return scores, indices
+
+        monkeypatch.setattr(engine.vector_store, "search", padded_search)
+
+        results = await engine.semantic_search("pears", top_k=100)
+
+        assert results == [chunks[1]] and results[0].semantic_score == 0.5
+
+    async def test_faiss_search_caps_k_at_index_size(self, engine, fake_faiss):
+        engine.vector_store = fake_faiss.IndexFlatIP(3)
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        results = await engine.semantic_search("pears", top_k=100)
+
+        scores = [chunk.semantic_score for chunk in results]
+        assert len(results) == len(chunks)
+        assert scores == sorted(scores, reverse=True)
+
+    async def test_keyword_search_keeps_best_matches_in_order(self, config):
+        engine = RAGEngine(config)
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+        engine.chunks[1].content = "apples pears plums"
+        engine.chunks[2].content = "plums only"
+
+        results = await engine.semantic_search("apples pears plums", top_k=2)
+
+        assert results[0] is engine.chunks[1]
+        assert results[0].semantic_score == 1.0
+        assert results[1].semantic_score == pytest.approx(2 / 3)
+
+    async def test_keyword_search_tokenizes_each_chunk_once(self, config):
+        engine = RAGEngine(config)
+        first = await engine.create_chunks(sample_text(), Path("first.txt"))
+        await engine.semantic_search("apples", top_k=1)
+        tokens = engine._chunk_tokens[:]
+
+        await engine.create_chunks("Plums and cherries. " * 10, Path("second.txt"))
+        results = await engine.semantic_search("cherries", top_k=1)
+
+        assert len(tokens) == len(first)
+        assert all(a is b for a, b in zip(engine._chunk_tokens, tokens))
+        assert len(engine._chunk_tokens) == len(engine.chunks)
+        assert results[0].chunk_id.startswith("second_chunk_")
+
+
+class TestRAGEngineVectorIndex:
+    """Test FAISS index management."""
+
+    async def test_flat_index_rebuilt_as_ivfpq_when_large(self, engine, config, fake_faiss, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_IVFPQ_MIN_VECTORS", 5)
+        config.vector_index_type = "ivfpq"
+        engine.vector_store = fake_faiss.IndexFlatIP(3)
+
+        chunks = await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        index = engine.vector_store
+        assert isinstance(index, FakeIVFPQIndex)
+        assert index.ntotal == len(chunks) and index.nprobe == 16
+        assert index.params == (int(4 * len(chunks) ** 0.5), 1, 8, 0)
+        np.testing.assert_array_equal(index.trained_on, [chunk.embedding for chunk in chunks])
+
+    async def test_flat_index_rebuilt_as_sq8_trained_on_unit_range(self, engine, config, fake_faiss):
+        config.vector_index_type = "sq8"
+        engine.vector_store = fake_faiss.IndexFlatIP(3)
+
+        first = await engine.create_chunks("Apples.", Path("first.txt"))
+        index = engine.vector_store
+        second = await engine.create_chunks(sample_text(), Path("second.txt"))
+
+        assert isinstance(index, FakeScalarQuantizerIndex) and engine.vector_store is index
+        assert index.params == (1, 0)
+        # A one-chunk first document must not pin the quantizer range
+        assert len(first) == 1
+        np.testing.assert_array_equal(index.trained_on, [[-1, -1, -1], [1, 1, 1]])
+        assert index.ntotal == len(first) + len(second)
+
+    async def test_flat_index_kept_by_default(self, engine, fake_faiss, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_IVFPQ_MIN_VECTORS", 5)
+        engine.vector_store = fake_faiss.IndexFlatIP(3)
+
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+
+        assert type(engine.vector_store) is FakeFlatIndex
+
+    async def test_initialize_moves_faiss_index_to_gpu(self, config, fake_faiss, monkeypatch):
+        gpu_resources = object()
+        monkeypatch.setattr(fake_faiss, "StandardGpuResources", lambda: gpu_resources, raising=False)
+        monkeypatch.setattr(fake_faiss, "get_num_gpus", lambda: 1, raising=False)
+        monkeypatch.setattr(
+            fake_faiss, "index_cpu_to_gpu", lambda res, device, index: ("gpu", res, device, index), raising=False
+        )
+        config.embedding_model = "local/model"
+        config.vector_store_type = "faiss"
+        config.use_gpu = True
+        engine = RAGEngine(config)
+
+        await engine.initialize()
+
+        kind, res, device, index = engine.vector_store
+        assert (kind, res, device) == ("gpu", gpu_resources, 0)
+        assert isinstance(index, FakeFlatIndex) and engine._gpu_resources is gpu_resources
+
+    async def test_initialize_keeps_faiss_index_on_cpu_by_default(self, config, fake_faiss, monkeypatch):
+        monkeypatch.setattr(fake_faiss, "get_num_gpus", lambda: 1, raising=False)
+        config.embedding_model = "local/model"
+        config.vector_store_type = "faiss"
+        engine = RAGEngine(config)
+
+        await engine.initialize()
+
+        assert isinstance(engine.vector_store, FakeFlatIndex)
+
+
+class TestHybridOCREngine:
+    """Test Tesseract-backed OCR."""
+
+    @pytest.fixture
+    def ocr_engine(self, config, fake_tesseract):
+        engine = HybridOCREngine.__new__(HybridOCREngine)
+        engine.config = config
+        engine.tesseract_available = True
+        return engine
+
+    async def test_tesseract_runs_off_the_event_loop(self, ocr_engine, fake_tesseract):
+        text, confidence = await ocr_engine._tesseract_extract(b"scanned words")
+
+        assert (text, confidence) == ("scanned words", 0.9)
+        assert fake_tesseract.calls
+        assert all(thread != threading.get_ident() for _, _, thread in fake_tesseract.calls)
+
+    async def test_tesseract_recognizes_each_image_once(self, ocr_engine, fake_tesseract):
+        await ocr_engine._tesseract_extract(b"scanned words")
+
+        assert [name for name, _, _ in fake_tesseract.calls] == ["image_to_data"]
+
+    async def test_tesseract_gets_bounded_grayscale_image(self, ocr_engine, fake_tesseract, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_OCR_MAX_IMAGE_SIDE", 700)
+
+        await ocr_engine._tesseract_extract(b"scanned words")
+
+        image = fake_tesseract.images[0]
+        assert image.mode == "L"
+        assert image.size == (500, 700)
+
+    def test_text_from_tesseract_data_keeps_layout(self):
+        data = {
+            "block_num": [0, 1, 1, 1, 1, 1, 2],
+            "par_num": [0, 1, 1, 1, 1, 2, 1],
+            "line_num": [0, 1, 1, 2, 2, 1, 1],
+            "text": ["", "Hello", "world", "second", " ", "Next", "Footer"],
+        }
+
+        text = HybridOCREngine._text_from_tesseract_data(data)
+
+        assert text == "Hello world\nsecond\n\nNext\n\nFooter"
+
+    async def test_extract_text_from_images_keeps_input_order(self, ocr_engine, monkeypatch):
+        async def no_ai(image_data):
+            return "", 0.0
+
+        monkeypatch.setattr(ocr_engine, "_ai_ocr_extract", no_ai)
+
+        results = await ocr_engine.extract_text_from_images([b"page one", b"page two"])
+
+        assert [text for text, _ in results] == ["page one", "page two"]
+        assert all(details["method"] == "ocr_primary" for _, details in results)
+
+
+class TestMimicDocsrayProviderDocuments:
+    """Test local document resolution."""
+
+    async def test_ensure_local_document_hashes_local_file(self, tmp_path):
+        doc_path = tmp_path / "doc.txt"
+        doc_path.write_bytes(b"local body")
+        document = Document(url=str(doc_path))
+
+        assert await MimicDocsrayProvider()._ensure_local_document(document) == doc_path
+        assert document.hash == hashlib.sha256(b"local body").hexdigest()
+
+    async def test_ensure_local_document_hashes_download_while_streaming(self, tmp_path, monkeypatch):
+        downloaded = tmp_path / "remote.pdf"
+        body = b"%PDF-1.4 remote"
+
+        async def fake_download(url, hasher=None):
+            downloaded.write_bytes(body)
+            hasher.update(body)
+            return downloaded
+
+        def fail(path):
+            raise AssertionError("download should not be re-read for hashing")
+
+        monkeypatch.setattr("docsray.providers.mimic_docsray.download_document", fake_download)
+        monkeypatch.setattr("docsray.providers.mimic_docsray.calculate_file_hash", fail)
+        document = Document(url="https://example.com/remote.pdf")
+
+        assert await MimicDocsrayProvider()._ensure_local_document(document) == downloaded
+        assert document.hash == hashlib.sha256(body).hexdigest()
+
+
+class TestMimicDocsrayProviderText:
+    """Test document text extraction."""
+
+    async def test_extracted_text_is_reused_until_file_changes(self, tmp_path, fake_pymupdf4llm):
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"v1")
+        provider = MimicDocsrayProvider()
+
+        assert await provider._extract_text_content(doc_path, markdown=True) == "# Parsed v1"
+        assert await provider._extract_text_content(doc_path, markdown=True) == "# Parsed v1"
+        doc_path.write_bytes(b"v22")
+        assert await provider._extract_text_content(doc_path, markdown=True) == "# Parsed v22"
+
+        assert len(fake_pymupdf4llm) == 2
+
+    async def test_text_cache_evicts_least_recently_used(self, tmp_path, fake_pymupdf4llm, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_TEXT_CACHE_SIZE", 2)
+        paths = []
+        for name in ("a", "b", "c"):
+            paths.append(tmp_path / f"{name}.pdf")
+            paths[-1].write_bytes(name.encode())
+        a, b, c = paths
+        provider = MimicDocsrayProvider()
+
+        for path in (a, b, a, c, a, b):
+            await provider._extract_text_content(path, markdown=True)
+
+        assert fake_pymupdf4llm == [str(a), str(b), str(c), str(b)]
+
+    async def test_failed_extraction_is_not_cached(self, tmp_path, monkeypatch):
+        calls = []
+
+        def to_markdown(path):
+            calls.append(path)
+            raise RuntimeError("broken pdf")
+
+        monkeypatch.setitem(sys.modules, "pymupdf4llm", SimpleNamespace(to_markdown=to_markdown))
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF")
+        provider = MimicDocsrayProvider()
+
+        assert await provider._extract_text_content(doc_path, markdown=True) == ""
+        assert await provider._extract_text_content(doc_path, markdown=True) == ""
+        assert len(calls) == 2
+
+    async def test_pdf_text_skips_pages_without_text(self, tmp_path, monkeypatch):
+        pages = [SimpleNamespace(get_text=lambda kind, text=text: text) for text in ("Page one\n", " \n", "", "Page four\n")]
+
+        class FakePDF:
+            def __init__(self, path):
+                pass
+
+            def __enter__(self):
+                return pages
+
+            def __exit__(self, *exc):
+                return False
+
+        def to_markdown(path):
+            raise AssertionError("plain text should not convert to Markdown")
+
+        monkeypatch.setitem(sys.modules, "fitz", SimpleNamespace(open=FakePDF))
+        monkeypatch.setitem(sys.modules, "pymupdf4llm", SimpleNamespace(to_markdown=to_markdown))
+        doc_path = tmp_path / "scan.pdf"
+        doc_path.write_bytes(b"%PDF")
+
+        assert await MimicDocsrayProvider()._extract_text_content(doc_path) == "Page one\n\nPage four\n"
+
+    async def test_page_count_of_text_file_uses_file_size(self, tmp_path, monkeypatch):
+        doc_path = tmp_path / "notes.txt"
+        doc_path.write_text("x" * 7000)
+        provider = MimicDocsrayProvider()
+
+        async def fail(path):
+            raise AssertionError("page count should not extract text")
+
+        monkeypatch.setattr(provider, "_extract_text_content", fail)
+
+        assert await provider._estimate_page_count(doc_path) == 2
+        assert await provider._estimate_page_count(tmp_path / "slides.pptx") == 1
+
+    async def test_parsing_and_page_count_run_off_the_event_loop(self, tmp_path, monkeypatch):
+        threads = []
+
+        def to_markdown(path):
+            threads.append(threading.get_ident())
+            return "# Parsed"
+
+        class FakePDF:
+            def __init__(self, path):
+                threads.append(threading.get_ident())
+
+            def __enter__(self):
+                return [1, 2, 3]
+
+            def __exit__(self, *exc):
+                return False
+
+        monkeypatch.setitem(sys.modules, "pymupdf4llm", SimpleNamespace(to_markdown=to_markdown))
+        monkeypatch.setitem(sys.modules, "fitz", SimpleNamespace(open=FakePDF))
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF")
+        provider = MimicDocsrayProvider()
+
+        assert await provider._extract_text_content(doc_path, markdown=True) == "# Parsed"
+        assert await provider._estimate_page_count(doc_path) == 3
+        assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+class TestMimicDocsrayProviderSearch:
+    """Test coarse-to-fine document search."""
+
+    async def test_fine_analysis_extracts_concurrently_in_candidate_order(self, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_FINE_ANALYSIS_CONCURRENCY", 3)
+        provider = MimicDocsrayProvider()
+        candidates = [{"path": name, "preview": f"File: {name}"} for name in ("a.txt", "b.txt", "c.txt")]
+        scores = {"a.txt": 0.9, "b.txt": 0.2, "c.txt": 0.5}
+        release = asyncio.Event()
+        started = []
+
+        async def coarse(query, search_path):
+            return candidates
+
+        async def extract(doc_path, markdown=False):
+            started.append(doc_path.name)
+            if len(started) == len(candidates):
+                release.set()
+            await release.wait()
+            return doc_path.name
+
+        async def fine(query, candidate, content):
+            return scores[content]
+
+        monkeypatch.setattr(provider, "_coarse_document_search", coarse)
+        monkeypatch.setattr(provider, "_extract_text_content", extract)
+        monkeypatch.setattr(provider, "_fine_semantic_analysis", fine)
+
+        results = await asyncio.wait_for(provider._coarse_to_fine_search("query", "docs", {}), 1)
+
+        assert [(result["path"], result["relevance_score"]) for result in results] == [("a.txt", 0.9), ("c.txt", 0.5)]
+
+    async def test_fine_analysis_scores_while_later_candidates_extract(self, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_FINE_ANALYSIS_CONCURRENCY", 2)
+        provider = MimicDocsrayProvider()
+        events = []
+
+        async def coarse(query, search_path):
+            return [{"path": str(i)} for i in range(5)]
+
+        async def extract(doc_path, markdown=False):
+            events.append(f"extract {doc_path}")
+            await asyncio.sleep(0)
+            return doc_path.name
+
+        async def fine(query, candidate, content):
+            events.append(f"score {content}")
+            return 0.5
+
+        monkeypatch.setattr(provider, "_coarse_document_search", coarse)
+        monkeypatch.setattr(provider, "_extract_text_content", extract)
+        monkeypatch.setattr(provider, "_fine_semantic_analysis", fine)
+
+        results = await provider._coarse_to_fine_search("query", "docs", {})
+
+        assert [result["path"] for result in results] == ["0", "1", "2", "3", "4"]
+        assert events.index("score 0") < events.index("extract 3")
+        assert [event for event in events if event.startswith("score")] == [f"score {i}" for i in range(5)]
+
+    async def test_fine_scores_do_not_depend_on_extraction_order(self, config, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_FINE_ANALYSIS_CONCURRENCY", 2)
+        texts = {"a.txt": "Bananas and papayas. " * 6, "b.txt": "Eleven green trees here. " * 6}
+
+        async def search(finishes_first):
+            provider = MimicDocsrayProvider()
+            provider.rag_engine = RAGEngine(config)
+            provider.rag_engine.embedding_model = FakeEmbeddingModel()
+            provider.rag_engine._initialized = True
+            first_done = asyncio.Event()
+
+            async def coarse(query, search_path):
+                return [{"path": name} for name in texts]
+
+            async def extract(doc_path, markdown=False):
+                if doc_path.name != finishes_first:
+                    await first_done.wait()
+                first_done.set()
+                return texts[doc_path.name]
+
+            monkeypatch.setattr(provider, "_coarse_document_search", coarse)
+            monkeypatch.setattr(provider, "_extract_text_content", extract)
+            results = await provider._coarse_to_fine_search("banana", "docs", {})
+            return [(result["path"], result["relevance_score"]) for result in results]
+
+        in_order = await search("a.txt")
+        out_of_order = await search("b.txt")
+
+        assert in_order == out_of_order
+        assert [path for path, _ in in_order] == ["a.txt", "b.txt"]
+        assert in_order[0][1] != in_order[1][1]
+
+    async def test_repeated_searches_do_not_index_candidates(self, config, tmp_path):
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (tmp_path / name).write_text(sample_text())
+        provider = MimicDocsrayProvider()
+        provider.rag_engine = engine = RAGEngine(config)
+        engine.embedding_model = FakeEmbeddingModel()
+        engine._initialized = True
+        await engine.create_chunks("Bananas are yellow. " * 5, Path("indexed.txt"))
+        indexed = len(engine.chunks)
+
+        runs = [await provider._coarse_to_fine_search("apples", str(tmp_path), {}) for _ in range(3)]
+
+        assert len(runs[0]) == 3 and runs[0] == runs[1] == runs[2]
+        assert len(engine.chunks) == len(engine._embedded_chunks) == len(engine._embedding_matrix) == indexed
+
+    async def test_cached_semantic_results_survive_search(self, config, tmp_path, monkeypatch):
+        (tmp_path / "notes.txt").write_text(sample_text())
+        provider = MimicDocsrayProvider()
+        provider.config = config
+        provider.rag_engine = engine = RAGEngine(config)
+        engine.embedding_model = FakeEmbeddingModel()
+        engine._initialized = True
+        await engine.create_chunks(sample_text(), Path("doc.txt"))
+        searched = []
+        search_embeddings = engine._search_embeddings
+        monkeypatch.setattr(engine, "_search_embeddings", lambda q, k: searched.append(k) or search_embeddings(q, k))
+
+        first = await engine.semantic_search("apples", top_k=1)
+        found = await provider.search("apples", str(tmp_path), {})
+        again = await engine.semantic_search("apples", top_k=1)
+
+        assert found.statistics["searchStrategy"] == "coarse_to_fine" and found.total_found == 1
+        assert again == first and searched == [1]
+
+    def make_tree(self, root):
+        (root / "sub" / "deeper").mkdir(parents=True)
+        (root / "Report.PDF").write_bytes(b"%PDF")
+        (root / "notes.txt").write_text("notes")
+        (root / "image.png").write_bytes(b"png")
+        (root / "archive.zip").write_bytes(b"zip")
+        (root / "sub" / "report-draft.md").write_text("draft")
+        (root / "sub" / "deeper" / "report.docx").write_bytes(b"docx")
+        return root
+
+    async def test_basic_search_walks_tree_for_document_names(self, tmp_path):
+        root = self.make_tree(tmp_path)
+
+        results = await MimicDocsrayProvider()._basic_search("report", str(root), {})
+
+        assert [Path(result["path"]).relative_to(root).as_posix() for result in results] == [
+            "Report.PDF", "sub/report-draft.md", "sub/deeper/report.docx"
+        ]
+
+    async def test_coarse_search_keeps_supported_formats(self, tmp_path):
+        root = self.make_tree(tmp_path)
+        outside = tmp_path.parent / f"{tmp_path.name}-outside"
+        outside.mkdir()
+        (outside / "linked.pdf").write_bytes(b"%PDF")
+        (root / "link").symlink_to(outside, target_is_directory=True)
+
+        candidates = await MimicDocsrayProvider()._coarse_document_search("notes", str(root))
+
+        by_name = {Path(candidate["path"]).name: candidate["initial_score"] for candidate in candidates}
+        assert by_name == {"Report.PDF": 0.0, "notes.txt": 0.5, "image.png": 0.0, "report-draft.md": 0.0, "report.docx": 0.0}
+
+    async def test_fine_analysis_concurrency_is_capped(self, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_FINE_ANALYSIS_CONCURRENCY", 2)
+        provider = MimicDocsrayProvider()
+        running = peak = 0
+
+        async def coarse(query, search_path):
+            return [{"path": str(i)} for i in range(6)]
+
+        async def extract(doc_path, markdown=False):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return "text"
+
+        async def fine(query, candidate, content):
+            return 0.5
+
+        monkeypatch.setattr(provider, "_coarse_document_search", coarse)
+        monkeypatch.setattr(provider, "_extract_text_content", extract)
+        monkeypatch.setattr(provider, "_fine_semantic_analysis", fine)
+
+        results = await provider._coarse_to_fine_search("query", "docs", {})
+
+        assert len(results) == 6 and peak == 2
+
+
+class TestMimicDocsrayProviderAnalysis:
+    """Test text analysis helpers."""
+
+    async def test_entities_are_grouped_by_type(self):
+        text = "Paid $1,200.50 on 12/05/2024 to a@b.com, then $3 on 1-2-24 to c.d@e.org."
+
+        entities = await MimicDocsrayProvider()._extract_entities_advanced(text, [])
+
+        assert [(entity["text"], entity["type"]) for entity in entities] == [
+            ("a@b.com", "EMAIL"),
+            ("c.d@e.org", "EMAIL"),
+            ("12/05/2024", "DATE"),
+            ("1-2-24", "DATE"),
+            ("$1,200.50", "MONEY"),
+            ("$3", "MONEY"),
+        ]
+
+    async def test_entities_are_capped_at_fifty(self):
+        text = " ".join(f"user{i}@example.com" for i in range(60)) + " $5"
+
+        entities = await MimicDocsrayProvider()._extract_entities_advanced(text, [])
+
+        assert len(entities) == 50
+        assert {entity["type"] for entity in entities} == {"EMAIL"}
+
+    async def test_key_points_keep_first_ten_indicator_sentences(self):
+        text = "Filler. It is CRITICAL to test. The monkey sat. " + ". ".join(f"You must do {i}" for i in range(12))
+
+        key_points = await MimicDocsrayProvider()._extract_key_points_advanced(text, [])
+
+        assert key_points[:2] == ["It is CRITICAL to test", "The monkey sat"]
+        assert key_points[2:] == [f"You must do {i}" for i in range(8)]
+
+    async def test_sentiment_counts_indicator_words(self):
+        text = "Good results, great team. GOOD outcome but one problem and a bad failure good."
+
+        sentiment = await MimicDocsrayProvider()._analyze_sentiment_advanced(text)
+
+        assert sentiment["positive_indicators"] == 3
+        assert sentiment["negative_indicators"] == 3
+        assert sentiment["overall_sentiment"] == "neutral"
+
+    async def test_find_section_reports_matching_line(self):
+        text = "\n".join(f"line {i}" for i in range(30)) + "\nResults SECTION\nafter"
+
+        content, location, context = await MimicDocsrayProvider()._find_section_semantic(text, "results section")
+
+        assert location["line"] == context["line_number"] == 30
+        assert content.splitlines()[0] == "line 25"
+        assert content.splitlines()[-1] == "after"
+
+    async def test_find_section_missing(self):
+        _, location, context = await MimicDocsrayProvider()._find_section_semantic("a\nb", "a\nb")
+
+        assert location["found"] is False and context == {"found": False}
+
+    async def test_keyword_locate_positions_index_original_text(self):
+        text = "İstanbul notes. " * 3 + "The KEY finding."
+
+        content, location, _ = await MimicDocsrayProvider()._semantic_search_and_locate(text, "key finding")
+
+        assert location == {"query": "key finding", "position": text.index("KEY"), "type": "keyword_match"}
+        assert content.endswith("The KEY finding.")
+
+    async def test_navigate_to_page_returns_page_words(self, tmp_path):
+        provider = MimicDocsrayProvider()
+        doc_path = tmp_path / "words.txt"
+        doc_path.write_text("\n".join(f"w{i}" for i in range(1000)))
+        text = await provider._extract_text_content(doc_path)
+        key = provider._text_cache_key(doc_path)
+
+        first, _, context = await provider._navigate_to_page(text, 1, key)
+        second, location, _ = await provider._navigate_to_page(text, 2, key)
+        missing, _, _ = await provider._navigate_to_page(text, 3, key)
+
+        assert first == " ".join(f"w{i}" for i in range(500))
+        assert second == " ".join(f"w{i}" for i in range(500, 1000))
+        assert missing == ""
+        assert context == {"totalPages": 2} and location == {"page": 2, "type": "page"}
+        assert provider._page_offsets_cache == {key: [0, text.index("w500")]}
+
+    async def test_page_offsets_evicted_with_cached_text(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(mimic_docsray, "_TEXT_CACHE_SIZE", 1)
+        provider = MimicDocsrayProvider()
+        first_path, second_path = tmp_path / "first.txt", tmp_path / "second.txt"
+        first_path.write_text("one two three")
+        second_path.write_text("four five")
+
+        text = await provider._extract_text_content(first_path)
+        await provider._navigate_to_page(text, 1, provider._text_cache_key(first_path))
+        # Text that isn't the cached string for the key is never cached
+        await provider._navigate_to_page("one two three", 1, provider._text_cache_key(second_path))
+        assert list(provider._page_offsets_cache) == [provider._text_cache_key(first_path)]
+
+        await provider._extract_text_content(second_path)
+
+        assert provider._page_offsets_cache == {}
+
+    async def test_navigate_to_page_of_empty_text(self):
+        content, _, context = await MimicDocsrayProvider()._navigate_to_page("  \n ", 1)
+
+        assert content == "" and context == {"totalPages": 1}
@@ -4,14 +4,17 @@ import asyncio
 import tempfile
 from pathlib import Path
 
+import httpx
 import pytest
 
 from docsray.utils.cache import DocumentCache
 from docsray.utils.documents import (
     calculate_file_hash,
     get_document_format,
+    is_download_current,
     is_url,
 )
+from docsray.utils.llamaparse_cache import LlamaParseCache
 from docsray.utils.logging import setup_logging
 
 
@@ -130,6 +133,56 @@ class TestDocumentUtils:
             tmp_path.unlink()
 
 
+    @pytest.mark.asyncio
+    async def test_is_download_current(self, monkeypatch):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200)
+
+        transport = httpx.MockTransport(handler)
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            "docsray.utils.documents.httpx.AsyncClient",
+            lambda **kwargs: real_client(transport=transport, **kwargs),
+        )
+        url = "https://example.com/file.pdf"
+
+        assert await is_download_current(url, {"etag": '"v1"'}) is True
+        assert await is_download_current(url, {"etag": '"v2"'}) is False
+        assert await is_download_current(url, {}) is False
+        assert [r.method for r in seen] == ["HEAD", "HEAD"]
+
+
+class TestLlamaParseCache:
+    """Test LlamaParseCache persistence."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    async def test_store_and_retrieve_roundtrip(self, tmp_path, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr("docsray.utils.llamaparse_cache.orjson", None)
+        cache = LlamaParseCache(cache_root=tmp_path / "cache")
+        doc_path = tmp_path / "doc.pdf"
+        doc_path.write_bytes(b"%PDF-1.4 test")
+        extraction = {
+            "documents": [{"text": "Body", "metadata": {}}],
+            "pages": [{"page_num": 1, "text": "Body", "markdown": "# Body", "layout": {"columns": 2}}],
+            "tables": [{"page": 1, "html": "<table></table>", "data": [[1, 2]], "metadata": {}}],
+            "images": [],
+            "metadata": {"title": "Doc"},
+        }
+        
+        await cache.store_extraction(doc_path, extraction, "instruction")
+        
+        assert await cache.retrieve_extraction(doc_path, "instruction") == extraction
+        assert await cache.retrieve_extraction(doc_path, "other instruction") is None
+        assert cache.get_cache_info(doc_path)["statistics"]["tables"] == 1
+
+
 class TestLogging:
     """Test logging setup."""
     